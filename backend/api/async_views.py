@@ -0,0 +1,129 @@
+"""
+Асинхронные точки входа для справочников и выгрузки списка покупок под
+ASGI (ASYNC_VIEWS). Подключаются в api.urls перед ViewSet'ами DRF.
+
+Django 3.2 выполняет синхронные представления под ASGI в одном общем
+потоке, поэтому здесь те же представления DRF целиком вызываются через
+run_in_pool — в отдельном пуле из ASYNC_DB_THREADS потоков. Пул
+ограничен, чтобы число соединений с БД не росло вместе с числом
+одновременных запросов. Аутентификация, права, троттлинг, согласование
+формата и обработка ошибок остаются такими же, как у синхронных
+представлений.
+
+Потоковые ответы (txt и csv списка покупок) Django 3.2 под ASGI
+перебирает синхронно в цикле событий, поэтому им добавляется
+async_streaming_content: части читаются в пуле и отдаются
+foodgram.asgi.ASGIHandler по мере готовности.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .views import IngredientsViewSet, RecipeViewSet, TagsViewSet
+
+STREAM_BATCH = 100
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='async-db'
+)
+
+
+def run_in_pool(func, *args, **kwargs):
+    """
+    Синхронный код с ORM в пуле executor. Соединение потока
+    закрывается так же, как после обычного запроса (CONN_MAX_AGE).
+    """
+    def call():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False, executor=executor)()
+
+
+def call_view(view, request, *args, **kwargs):
+    """Вызывает представление; ответ DRF рендерится здесь же, в пуле."""
+    response = view(request, *args, **kwargs)
+    if callable(getattr(response, 'render', None)):
+        response.render()
+    return response
+
+
+def produce(response, queue, loop, closed):
+    """
+    Перебирает потоковый ответ целиком в одном потоке пула: курсор
+    .iterator() привязан к соединению этого потока. Части передаются
+    пачками через queue, её размер ограничен, так что медленный клиент
+    притормаживает чтение из БД, а не копит ответ в памяти.
+    """
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    parts = iter(response)
+    try:
+        for batch in iter(lambda: list(islice(parts, STREAM_BATCH)), []):
+            if closed.is_set():
+                return
+            put(batch)
+        put(None)
+    except Exception as error:
+        if not closed.is_set():
+            put(error)
+    finally:
+        response.close()
+
+
+async def stream_in_pool(response):
+    """Части потокового ответа, прочитанные в пуле через produce."""
+    queue = asyncio.Queue(maxsize=1)
+    closed = threading.Event()
+    producer = asyncio.ensure_future(run_in_pool(
+        produce, response, queue, asyncio.get_running_loop(), closed
+    ))
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            for part in batch:
+                yield part
+    finally:
+        # Освобождает место в очереди, чтобы produce заметил closed.
+        closed.set()
+        if not queue.empty():
+            queue.get_nowait()
+        await producer
+
+
+def in_pool(view):
+    """Асинхронная обёртка над синхронным представлением DRF."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response = await run_in_pool(
+            call_view, view, request, *args, **kwargs
+        )
+        if response.streaming:
+            response.async_streaming_content = stream_in_pool(response)
+        return response
+    return wrapper
+
+
+tag_list = in_pool(TagsViewSet.as_view({'get': 'list'}))
+tag_detail = in_pool(TagsViewSet.as_view({'get': 'retrieve'}))
+ingredient_list = in_pool(IngredientsViewSet.as_view({'get': 'list'}))
+ingredient_detail = in_pool(
+    IngredientsViewSet.as_view({'get': 'retrieve'})
+)
+download_shopping_cart = in_pool(RecipeViewSet.as_view(
+    {'get': 'download_shopping_cart'},
+    basename='recipes', detail=False,
+    **RecipeViewSet.download_shopping_cart.kwargs
+))
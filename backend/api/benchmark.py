@@ -0,0 +1,101 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from recipes import counters, shopping_list, versions
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Follow, User
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def measure(func, repeat):
+    """Время выполнения func в миллисекундах: среднее и перцентили."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'mean': statistics.mean(timings),
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+    }
+
+
+def percentile(sorted_values, percent):
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def format_stats(stats):
+    return ' '.join(f'{key}={value:.3f}ms' for key, value in stats.items())
+
+
+def make_dataset(size, seed=0):
+    """
+    Набор данных для bench_api: size рецептов, size // 10 авторов,
+    у пользователя bench@example.com подписки, избранное и корзина.
+    Возвращает (пользователь, [id рецептов], [id авторов]).
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        User(email=f'user{i}@example.com', username=f'user{i}',
+             first_name='Имя', last_name='Фамилия', password=password)
+        for i in range(max(size // 10, 2) + 1)
+    )
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    bench_user = User.objects.get(pk=user_ids[0])
+    authors = user_ids[1:]
+    Tag.objects.bulk_create(
+        Tag(name=f'Тег {i}', color=f'#00000{i}', slug=f'tag{i}')
+        for i in range(5)
+    )
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(max(size, 100))
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(author_id=rng.choice(authors), name=f'Рецепт {i}',
+               text='Описание', cooking_time=rng.randint(1, 120),
+               image='recipes/images/bench.jpg')
+        for i in range(size)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=rng.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(ingredient_ids, 5)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, 2)
+    )
+    Follow.objects.bulk_create(
+        Follow(user_id=bench_user.pk, author_id=author_id)
+        for author_id in rng.sample(authors, min(len(authors) - 1, 20))
+    )
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create(
+            model(user_id=bench_user.pk, recipe_id=recipe_id)
+            for recipe_id in rng.sample(recipe_ids, min(size - 1, 10))
+        )
+    Favorite.objects.bulk_create(
+        (Favorite(user_id=rng.choice(authors),
+                  recipe_id=rng.choice(recipe_ids))
+         for _ in range(size)),
+        ignore_conflicts=True
+    )
+    shopping_list.rebuild([bench_user.pk])
+    counters.reconcile()
+    versions.bump(versions.INGREDIENTS)
+    return bench_user, recipe_ids, authors
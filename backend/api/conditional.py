@@ -0,0 +1,110 @@
+"""
+Условные GET-запросы: ETag и Last-Modified считаются по дешёвым
+отметкам версий до сериализации, при совпадении отдаётся 304.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers, quote_etag)
+from django.utils.http import http_date
+from recipes import versions
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional(get_stamp):
+    """
+    Декоратор метода ViewSet. get_stamp(view, request, **kwargs)
+    возвращает (etag, last_modified, cache_control) или None, если
+    отметку получить нельзя и запрос нужно обработать как обычно.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            return respond(
+                request, get_stamp(self, request, **kwargs),
+                lambda: method(self, request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def respond(request, stamp, get_response):
+    """304 по отметке stamp или ответ get_response() с её заголовками."""
+    if stamp is None:
+        return get_response()
+    etag, last_modified, cache_control = stamp
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, **cache_control)
+        patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def catalog_stamp(table):
+    """Отметка справочника: общая для всех пользователей."""
+    def get_stamp(view, request, **kwargs):
+        version, updated_at = versions.get_versions(table)[table]
+        return (
+            make_etag(table, version),
+            updated_at,
+            {'public': True, 'max_age': settings.CATALOG_CACHE_MAX_AGE},
+        )
+    return get_stamp
+
+
+def recipe_stamp(view, request, pk=None, **kwargs):
+    """
+    Отметка рецепта: дата изменения, счётчики, данные автора, версии
+    справочников и, для авторизованных, флаги избранного, корзины
+    и подписки. Счётчики и флаги меняются без изменения рецепта,
+    поэтому отдаётся только ETag.
+    """
+    user = request.user
+    fields = [
+        'updated_at', 'favorites_count', 'carts_count',
+        'author__email', 'author__username',
+        'author__first_name', 'author__last_name',
+        'author__recipes_count', 'author__followers_count',
+    ]
+    try:
+        queryset = Recipe.objects.filter(pk=pk)
+    except ValueError:
+        return None
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('author'))
+            ),
+        )
+        fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+    try:
+        row = queryset.values_list(*fields).get()
+    except Recipe.DoesNotExist:
+        return None
+    catalog = versions.get_versions(versions.TAGS, versions.INGREDIENTS)
+    etag = make_etag('recipe', pk, user.pk, row, sorted(catalog.items()))
+    if user.is_authenticated:
+        return etag, None, {'private': True, 'no_cache': True}
+    return etag, None, {'public': True, 'no_cache': True}
@@ -0,0 +1,26 @@
+from drf_extra_fields.fields import Base64FileField
+
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+class Base64ImageUploadField(Base64FileField):
+    """
+    Изображение в base64 без декодирования Pillow: тип определяется
+    по сигнатуре файла, полная проверка выполняется в фоновой задаче.
+    """
+    ALLOWED_TYPES = ('jpg', 'png', 'gif', 'webp')
+    INVALID_TYPE_MESSAGE = ('Загрузите изображение в формате JPEG, PNG, '
+                            'GIF или WebP.')
+
+    def get_file_extension(self, filename, decoded_file):
+        for signature, extension in SIGNATURES:
+            if decoded_file.startswith(signature):
+                return extension
+        if decoded_file[:4] == b'RIFF' and decoded_file[8:12] == b'WEBP':
+            return 'webp'
+        return None
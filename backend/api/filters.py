@@ -3,16 +3,38 @@
 from django_filters import FilterSet, ModelMultipleChoiceFilter
 from django_filters import rest_framework as filters
 from recipes.models import Recipe, Tag
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .search import search_recipes
 
 
 class IngredientSearchFilter(SearchFilter):
     search_param = 'name'
 
 
+class RecipeOrderingFilter(OrderingFilter):
+    """
+    Сортировка рецептов по ?ordering=, например -favorites_count.
+    ?ordering=trending — сначала популярные сейчас.
+    """
+    ordering_fields = ('pub_date', 'favorites_count', 'carts_count',
+                       'trending_score')
+    aliases = {'trending': '-trending_score'}
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        fields = [self.aliases.get(field, field) for field in fields]
+        return super().remove_invalid_fields(queryset, fields, view, request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering[-1].lstrip('-') in ('id', 'pk'):
+            return ordering
+        return [*ordering, '-id']
+
+
 class RecipeFilter(FilterSet):
     """
-    Фильтры по тегам, избранному и корзине покупок.
+    Фильтры по тегам, избранному, корзине покупок и поиск по тексту.
     """
     tags = ModelMultipleChoiceFilter(field_name='tags__slug',
                                      to_field_name='slug',
@@ -21,17 +43,26 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+                  'search')
 
     def filter_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(favorites__user=self.request.user)
-        return queryset
+        if not value:
+            return queryset
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(is_favorited=True)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(carts__user=self.request.user)
-        return queryset
+        if not value:
+            return queryset
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(is_in_shopping_cart=True)
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
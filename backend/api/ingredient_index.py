@@ -0,0 +1,102 @@
+"""
+Индекс ингредиентов в памяти процесса для автодополнения по названию.
+
+Справочник почти не меняется, поэтому он загружается один раз и
+перечитывается, когда версия INGREDIENTS в БД отличается от версии
+загруженного снимка (изменения из других процессов и load_ingrs), после
+изменения Ingredient в этом процессе или по истечении
+INGREDIENT_INDEX_TTL секунд. Версия сверяется после отметки для ETag,
+поэтому ответ никогда не старше своего ETag.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes import versions
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """
+    Ключи, записи, версия справочника и время загрузки хранятся одним
+    кортежем в _snapshot и подменяются одним присваиванием, поэтому
+    читатель в другом потоке всегда видит согласованную версию.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def invalidate(self):
+        self._snapshot = None
+
+    @staticmethod
+    def current_version():
+        return versions.get_versions(versions.INGREDIENTS)[
+            versions.INGREDIENTS
+        ][0]
+
+    def load(self):
+        # Версия читается до строк: снимок не может оказаться старше неё.
+        version = self.current_version()
+        entries = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        snapshot = (
+            tuple(entry[0] for entry in entries),
+            tuple(entries),
+            version,
+            time.monotonic(),
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def is_fresh(self, snapshot, version):
+        return snapshot is not None and snapshot[2] == version and (
+            time.monotonic() - snapshot[3] <= settings.INGREDIENT_INDEX_TTL
+        )
+
+    def get_entries(self):
+        version = self.current_version()
+        snapshot = self._snapshot
+        if not self.is_fresh(snapshot, version):
+            with self._lock:
+                snapshot = self._snapshot
+                if not self.is_fresh(snapshot, version):
+                    snapshot = self.load()
+        return snapshot[0], snapshot[1]
+
+    def search(self, query, limit=None):
+        """
+        Сначала совпадения по началу названия, затем по вхождению,
+        в каждой группе по алфавиту.
+        """
+        keys, entries = self.get_entries()
+        query = query.strip().casefold()
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + '\uffff', lo=start)
+        found = list(entries[start:end])
+        if query and (limit is None or len(found) < limit):
+            found = found + [
+                entry for entry in entries
+                if query in entry[0] and not entry[0].startswith(query)
+            ]
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, pk, name, measurement_unit in found[:limit]
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
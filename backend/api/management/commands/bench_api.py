@@ -0,0 +1,230 @@
+import base64
+import io
+import json
+import tempfile
+
+from api.benchmark import BENCH_PASSWORD, format_stats, make_dataset, measure
+from api.ingredient_index import ingredient_index
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from PIL import Image
+from recipes.models import Favorite, Ingredient, Tag
+from rest_framework.test import APIClient
+from users.models import Follow
+
+# Допустимое число SQL-запросов на один вызов; не зависит от размера данных.
+# Числа измерены на SQLite и включают BEGIN и SAVEPOINT/RELEASE транзакций.
+# На PostgreSQL они не измерялись: там транзакция открывается без
+# отдельного BEGIN, поэтому запросов должно быть не больше.
+# Переключатели — это два запроса, POST и DELETE. Кроме проверки токена,
+# каждый меняет счётчики в транзакции. Подписка дополнительно заполняет
+# ленту подписчика и отдаёт автора с рецептами.
+BUDGETS = {
+    'recipes-list': 6,
+    'recipes-list-anonymous': 4,
+    'recipe-detail': 7,
+    'recipe-create': 27,
+    'download-shopping-cart': 2,
+    'ingredients-search': 2,
+    'subscriptions': 4,
+    'favorite-toggle': 13,
+    'subscribe-toggle': 18,
+}
+
+
+def png_data_url():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 120, 40)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def make_scenarios(user, recipe_ids, authors):
+    """{название: (анонимно, функция от клиента со списком ответов)}."""
+    recipe_id = recipe_ids[len(recipe_ids) // 2]
+    followed = set(Follow.objects.filter(
+        user=user
+    ).values_list('author_id', flat=True))
+    author_id = next(pk for pk in authors if pk not in followed)
+    favorites = set(Favorite.objects.filter(
+        user=user
+    ).values_list('recipe_id', flat=True))
+    favorite_id = next(pk for pk in recipe_ids if pk not in favorites)
+    new_recipe = {
+        'name': 'Новый рецепт', 'text': 'Описание', 'cooking_time': 10,
+        'image': png_data_url(),
+        'tags': [Tag.objects.values_list('id', flat=True).first()],
+        'ingredients': [{
+            'id': Ingredient.objects.values_list('id', flat=True).first(),
+            'amount': 100,
+        }],
+    }
+    return {
+        'recipes-list': (False, lambda client: [
+            client.get('/api/recipes/')
+        ]),
+        'recipes-list-anonymous': (True, lambda client: [
+            client.get('/api/recipes/')
+        ]),
+        'recipe-detail': (False, lambda client: [
+            client.get(f'/api/recipes/{recipe_id}/')
+        ]),
+        'recipe-create': (False, lambda client: [
+            client.post('/api/recipes/', new_recipe, format='json')
+        ]),
+        'download-shopping-cart': (False, lambda client: [
+            client.get('/api/recipes/download_shopping_cart/')
+        ]),
+        'ingredients-search': (True, lambda client: [
+            client.get('/api/ingredients/?name=ингредиент 1')
+        ]),
+        'subscriptions': (False, lambda client: [
+            client.get('/api/users/subscriptions/')
+        ]),
+        'favorite-toggle': (False, lambda client: [
+            client.post(f'/api/recipes/{favorite_id}/favorite/'),
+            client.delete(f'/api/recipes/{favorite_id}/favorite/'),
+        ]),
+        'subscribe-toggle': (False, lambda client: [
+            client.post(f'/api/users/{author_id}/subscribe/'),
+            client.delete(f'/api/users/{author_id}/subscribe/'),
+        ]),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark API endpoints on a test database for several dataset '
+        'sizes; fail when a query budget or the stored baseline is exceeded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000],
+            help='Number of recipes in each dataset.'
+        )
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument(
+            '--only', nargs='+', choices=sorted(BUDGETS),
+            help='Run only these scenarios.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON file with p95 latency and queries from a previous run.'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Write results to --baseline instead of comparing.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=25,
+            help='Allowed p95 slowdown against the baseline, percent.'
+        )
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('Для --save-baseline укажите --baseline')
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    results = self.run_sizes(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f'Baseline saved to {options["baseline"]}')
+            return
+        failures = self.check_results(results, options)
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
+
+    def run_sizes(self, options):
+        results = {}
+        self.stdout.write(f'Database: {connection.vendor}')
+        for size in options['sizes']:
+            call_command('flush', interactive=False, verbosity=0)
+            user, recipe_ids, authors = make_dataset(size)
+            ingredient_index.invalidate()
+            scenarios = make_scenarios(user, recipe_ids, authors)
+            client = APIClient()
+            token = client.post('/api/auth/token/login/', {
+                'email': user.email, 'password': BENCH_PASSWORD
+            }, format='json').data['auth_token']
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            self.stdout.write(f'\n{size} recipes')
+            for name, (anonymous, scenario) in scenarios.items():
+                if options['only'] and name not in options['only']:
+                    continue
+                run = self.make_run(
+                    APIClient() if anonymous else client, name, scenario
+                )
+                run()
+                reset_queries()
+                with CaptureQueriesContext(connection) as context:
+                    run()
+                queries = len(context.captured_queries)
+                stats = measure(run, options['repeat'])
+                results[f'{name}@{size}'] = {
+                    'queries': queries, 'p95': round(stats['p95'], 3)
+                }
+                self.stdout.write(
+                    f'  {name:<24} queries={queries}/{BUDGETS[name]} '
+                    f'{format_stats(stats)}'
+                )
+        return results
+
+    @staticmethod
+    def make_run(client, name, scenario):
+        def run():
+            for response in scenario(client):
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{name}: ответ {response.status_code} '
+                        f'{response.content[:200]!r}'
+                    )
+        return run
+
+    @staticmethod
+    def check_results(results, options):
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        failures = []
+        for key, result in results.items():
+            name = key.split('@')[0]
+            if result['queries'] > BUDGETS[name]:
+                failures.append(
+                    f'{key}: {result["queries"]} queries, '
+                    f'budget {BUDGETS[name]}'
+                )
+            stored = baseline.get(key)
+            if stored is None:
+                continue
+            if result['queries'] > stored['queries']:
+                failures.append(
+                    f'{key}: {result["queries"]} queries, '
+                    f'baseline {stored["queries"]}'
+                )
+            limit = stored['p95'] * (1 + options['tolerance'] / 100)
+            if result['p95'] > limit:
+                failures.append(
+                    f'{key}: p95 {result["p95"]:.3f}ms, '
+                    f'baseline {stored["p95"]:.3f}ms'
+                )
+        return failures
@@ -0,0 +1,37 @@
+from api.benchmark import format_stats, measure
+from api.ingredient_index import ingredient_index
+from django.core.management.base import BaseCommand
+from recipes.models import Ingredient
+
+DEFAULT_QUERIES = ('а', 'мо', 'сах', 'молоко', 'соль', 'карто', 'xyz')
+
+
+class Command(BaseCommand):
+    help = 'Compare ingredient name search via ORM and in-memory index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None)
+
+    def handle(self, *args, **options):
+        repeat, limit = options['repeat'], options['limit']
+        ingredient_index.invalidate()
+        load = measure(ingredient_index.load, 1)
+        self.stdout.write(f'index load: {format_stats(load)}')
+        for query in options['queries']:
+            orm = measure(
+                lambda: list(Ingredient.objects.filter(
+                    name__istartswith=query
+                ).values('id', 'name', 'measurement_unit')[:limit]),
+                repeat
+            )
+            index = measure(
+                lambda: ingredient_index.search(query, limit=limit), repeat
+            )
+            found = len(ingredient_index.search(query, limit=limit))
+            self.stdout.write(
+                f'{query!r} ({found} rows)\n'
+                f'  orm:   {format_stats(orm)}\n'
+                f'  index: {format_stats(index)}'
+            )
@@ -0,0 +1,63 @@
+import random
+
+from api.benchmark import format_stats, measure
+from api.pantry_index import pantry_index
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from recipes.models import IngredientAmount, Recipe
+
+DEFAULT_SIZES = (5, 10, 20, 50)
+
+
+def orm_search(ingredient_ids, limit):
+    """Тот же подбор одним GROUP BY по IngredientAmount для сравнения."""
+    return list(Recipe.objects.annotate(
+        total=Count('amounts'),
+        covered=Count(
+            'amounts', filter=Q(amounts__ingredient_id__in=ingredient_ids)
+        ),
+    ).filter(covered__gt=0).annotate(
+        coverage=Cast('covered', FloatField()) / F('total'),
+        missing=F('total') - F('covered'),
+    ).order_by('-coverage', 'missing', '-id').values_list(
+        'id', 'covered', 'total'
+    )[:limit])
+
+
+class Command(BaseCommand):
+    help = 'Compare pantry matching via ORM GROUP BY and in-memory index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', type=int,
+                            default=DEFAULT_SIZES)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        repeat, limit = options['repeat'], options['limit']
+        used = list(IngredientAmount.objects.order_by().values_list(
+            'ingredient_id', flat=True
+        ).distinct())
+        if not used:
+            self.stdout.write('No recipes with ingredients.')
+            return
+        rng = random.Random(options['seed'])
+        pantry_index.invalidate()
+        load = measure(pantry_index.load, 1)
+        self.stdout.write(f'index load: {format_stats(load)}')
+        for size in options['sizes']:
+            pantry = rng.sample(used, min(size, len(used)))
+            orm = measure(lambda: orm_search(pantry, limit), repeat)
+            index = measure(
+                lambda: pantry_index.search(pantry, limit), repeat
+            )
+            same = [pk for pk, _, _ in orm_search(pantry, limit)] == [
+                pk for pk, _, _ in pantry_index.search(pantry, limit)
+            ]
+            self.stdout.write(
+                f'{len(pantry)} ingredients (same top-{limit}: {same})\n'
+                f'  orm:   {format_stats(orm)}\n'
+                f'  index: {format_stats(index)}'
+            )
@@ -0,0 +1,34 @@
+from api.benchmark import format_stats, measure
+from api.search import search_recipes
+from django.core.management.base import BaseCommand
+from django.db import connection
+from recipes.models import Recipe
+
+DEFAULT_QUERIES = ('суп', 'курица с картофелем', 'шоколад', 'салат')
+
+
+class Command(BaseCommand):
+    help = 'Measure recipe search latency on the current database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Print the query plan for every query.'
+        )
+
+    def handle(self, *args, **options):
+        repeat, limit = options['repeat'], options['limit']
+        self.stdout.write(
+            f'{Recipe.objects.count()} recipes on {connection.vendor}'
+        )
+        for query in options['queries']:
+            queryset = search_recipes(Recipe.objects.all(), query)
+            stats = measure(
+                lambda: list(queryset.values('id')[:limit]), repeat
+            )
+            self.stdout.write(f'{query!r}: {format_stats(stats)}')
+            if options['explain']:
+                self.stdout.write(queryset[:limit].explain())
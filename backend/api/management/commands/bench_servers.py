@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from api.benchmark import percentile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+SERVERS = {
+    'wsgi': ('foodgram.wsgi', ()),
+    'asgi': ('foodgram.asgi', ('-k', 'uvicorn.workers.UvicornWorker')),
+}
+DEFAULT_PATHS = (
+    '/api/tags/',
+    '/api/ingredients/?name=а',
+    '/api/recipes/',
+    '/api/recipes/download_shopping_cart/',
+)
+AUTH_PATHS = ('/api/recipes/download_shopping_cart/',)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare gunicorn sync workers (WSGI) with uvicorn workers (ASGI) '
+        'under concurrent load on the current database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+        parser.add_argument(
+            '--servers', nargs='+', choices=sorted(SERVERS),
+            default=['wsgi', 'asgi']
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests per path and per the mixed run.'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--email',
+            help='User whose token is sent; required for the shopping list.'
+        )
+
+    def handle(self, *args, **options):
+        headers = {}
+        paths = list(options['paths'])
+        if options['email']:
+            user = User.objects.filter(email=options['email']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден')
+            token, _ = Token.objects.get_or_create(user=user)
+            headers['Authorization'] = f'Token {token.key}'
+        else:
+            paths = [path for path in paths if path not in AUTH_PATHS]
+        if not paths:
+            raise CommandError('Нет путей для проверки')
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        for name in options['servers']:
+            server = self.start(name, options)
+            try:
+                self.wait_ready(server, base_url)
+                self.stdout.write(
+                    f'\n{name}: {options["workers"]} workers, '
+                    f'{options["concurrency"]} concurrent clients'
+                )
+                for path in paths:
+                    self.report(path, self.load(
+                        base_url, [path], headers, options
+                    ))
+                if len(paths) > 1:
+                    self.report('mixed', self.load(
+                        base_url, paths, headers, options
+                    ))
+            finally:
+                server.terminate()
+                server.wait()
+
+    def start(self, name, options):
+        module, extra = SERVERS[name]
+        env = dict(os.environ, ASYNC_VIEWS=str(name == 'asgi'))
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', module, *extra,
+             '-w', str(options['workers']),
+             '-b', f'127.0.0.1:{options["port"]}'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    @staticmethod
+    def wait_ready(server, base_url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('Сервер завершился при запуске')
+            try:
+                requests.get(f'{base_url}/api/tags/', timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise CommandError('Сервер не запустился')
+
+    @staticmethod
+    def load(base_url, paths, headers, options):
+        """(время в мс по запросам, число ошибок, запросов в секунду)."""
+        local = threading.local()
+
+        def fetch(index):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            started = time.perf_counter()
+            response = local.session.get(
+                base_url + paths[index % len(paths)], headers=headers
+            )
+            response.content
+            return (time.perf_counter() - started) * 1000, response.ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        timings = sorted(timing for timing, _ in results)
+        errors = sum(not ok for _, ok in results)
+        return timings, errors, len(results) / elapsed
+
+    def report(self, label, result):
+        timings, errors, throughput = result
+        self.stdout.write(
+            f'  {label:<40} {throughput:8.1f} req/s '
+            f'p50={percentile(timings, 50):.1f}ms '
+            f'p95={percentile(timings, 95):.1f}ms '
+            f'p99={percentile(timings, 99):.1f}ms errors={errors}'
+        )
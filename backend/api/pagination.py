@@ -1,5 +1,248 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import heapq
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def cached_count(queryset):
+    """
+    COUNT(*) по запросу с кэшированием на PAGINATION_COUNT_CACHE_TIMEOUT
+    секунд. При нулевом таймауте считает каждый раз.
+    """
+    timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    if not timeout or not hasattr(queryset, 'query'):
+        return queryset.count()
+    key = 'pagination-count:{}'.format(
+        hashlib.md5(str(queryset.query).encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+    django_paginator_class = CachedCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу сортировки (cursor) без OFFSET и COUNT(*).
+    Сортировка берётся из cursor_ordering представления, затем из явного
+    order_by() набора, иначе ordering. Последнее поле должно быть
+    уникальным.
+    Общее количество отдаётся только по запросу ?count=1.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view, queryset)
+        position = self.decode_cursor(request, queryset)
+        items = list(self.get_items(queryset, position, self.page_size + 1))
+        self.has_next = len(items) > self.page_size
+        page = items[:self.page_size]
+        self.next_position = (
+            self.get_position(page[-1]) if self.has_next else None
+        )
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = cached_count(queryset)
+        return page
+
+    def get_items(self, queryset, position, limit):
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset.order_by(*self.ordering)[:limit]
+
+    def after(self, position):
+        """
+        Условие «строго после position». Первое поле вынесено отдельным
+        диапазоном, чтобы индекс использовался для поиска, а не фильтрации.
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        lookups = ['lt' if field.startswith('-') else 'gt'
+                   for field in self.ordering]
+        condition = Q()
+        for index, name in enumerate(names):
+            step = Q(**{f'{name}__{lookups[index]}': position[index]})
+            for prev_name, value in zip(names[:index], position):
+                step &= Q(**{prev_name: value})
+            condition |= step
+        first = Q(**{f'{names[0]}__{lookups[0]}e': position[0]})
+        return first & condition
+
+    def get_ordering(self, view, queryset):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return ordering
+        query = getattr(queryset, 'query', None)
+        if query is not None and query.order_by and all(
+            isinstance(field, str) for field in query.order_by
+        ):
+            return tuple(query.order_by)
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def get_position(self, item):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = (item[name] if isinstance(item, dict)
+                     else getattr(item, name))
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(b64decode(encoded.encode()).decode())
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                self.to_python(queryset.model, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound('Неверный курсор')
+
+    @staticmethod
+    def to_python(model, name, value):
+        try:
+            return model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def encode_cursor(self, position):
+        encoded = b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """
+    KeysetPagination по нескольким наборам values() с одинаковыми ключами
+    сортировки. Каждый набор читается по своему индексу, страница
+    собирается слиянием; повторы по последнему полю отбрасываются.
+    """
+    ordering = ('-pub_date', '-recipe_id')
+
+    def paginate_queryset(self, querysets, request, view=None):
+        return super().paginate_queryset(
+            MergedQuerySets(querysets), request, view
+        )
+
+    def get_items(self, querysets, position, limit):
+        key = self.sort_key
+        merged = heapq.merge(
+            *(super(MergedKeysetPagination, self).get_items(
+                queryset, position, limit
+            ) for queryset in querysets),
+            key=key
+        )
+        items, seen = [], set()
+        for item in merged:
+            unique = item[self.ordering[-1].lstrip('-')]
+            if unique not in seen:
+                seen.add(unique)
+                items.append(item)
+            if len(items) == limit:
+                break
+        return items
+
+    def sort_key(self, item):
+        return tuple(
+            Descending(item[field[1:]]) if field.startswith('-')
+            else item[field]
+            for field in self.ordering
+        )
+
+
+class Descending:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class MergedQuerySets(list):
+    """Список наборов с интерфейсом, нужным KeysetPagination."""
+    @property
+    def model(self):
+        return self[0].model
+
+    def count(self):
+        return sum(cached_count(queryset) for queryset in self)
+
+
+class CursorAwarePagination(BasePagination):
+    """
+    Постраничная пагинация по умолчанию; при наличии параметра cursor
+    (в том числе пустого) переключается на KeysetPagination.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = CustomPagination()
+        self.display_page_controls = False
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
@@ -0,0 +1,135 @@
+"""
+Инвертированный индекс «ингредиент → рецепты» в памяти процесса
+для подбора рецептов по имеющимся продуктам.
+
+Основа — отсортированные массивы id рецептов по каждому ингредиенту,
+собранные из IngredientAmount. Перед запросом сверяется версия
+RECIPE_INGREDIENTS; при её изменении составы рецептов, изменённых
+с прошлой проверки, читаются в небольшой оверлей, который перекрывает
+основу. Основа пересобирается, когда оверлей вырастает
+до OVERLAY_LIMIT рецептов или по истечении PANTRY_INDEX_TTL секунд.
+Удалённые рецепты отсеиваются при чтении результатов.
+"""
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from recipes import similarity, versions
+from recipes.models import IngredientAmount, Recipe
+
+OVERLAY_LIMIT = 10000
+OVERLAP = timedelta(minutes=1)
+
+
+class PantryIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base = None
+        self._overlay = {}
+        self._version = None
+        self._checked_at = None
+        self._loaded_at = 0
+
+    def invalidate(self):
+        self._base = None
+
+    def load(self):
+        version = self.current_version()
+        checked_at = timezone.now()
+        chunks = list(similarity.read_amounts())
+        recipes = np.concatenate(
+            [recipe_ids for recipe_ids, _ in chunks] or [np.empty(0, int)]
+        )
+        ingredients = np.concatenate(
+            [ingredient_ids for _, ingredient_ids in chunks]
+            or [np.empty(0, int)]
+        )
+        order = np.lexsort((recipes, ingredients))
+        recipes, ingredients = recipes[order], ingredients[order]
+        keys, starts = np.unique(ingredients, return_index=True)
+        postings = dict(zip(keys.tolist(), np.split(recipes, starts[1:])))
+        recipe_ids, totals = np.unique(recipes, return_counts=True)
+        self._base = (postings, recipe_ids, totals)
+        self._overlay = {}
+        self._version, self._checked_at = version, checked_at
+        self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def current_version():
+        return versions.get_versions(versions.RECIPE_INGREDIENTS)[
+            versions.RECIPE_INGREDIENTS
+        ][0]
+
+    def refresh(self):
+        """Подгружает в оверлей рецепты, изменённые с прошлой проверки."""
+        version = self.current_version()
+        if version == self._version:
+            return
+        checked_at = timezone.now()
+        changed = Recipe.objects.filter(
+            updated_at__gte=self._checked_at - OVERLAP
+        ).values('id')
+        overlay = dict(self._overlay)
+        for recipe_id in changed.values_list('id', flat=True):
+            overlay[recipe_id] = set()
+        for recipe_id, ingredient_id in IngredientAmount.objects.filter(
+            recipe_id__in=changed
+        ).values_list('recipe_id', 'ingredient_id'):
+            overlay[recipe_id].add(ingredient_id)
+        if len(overlay) > OVERLAY_LIMIT:
+            self.load()
+            return
+        self._overlay = {
+            recipe_id: frozenset(ingredient_ids)
+            for recipe_id, ingredient_ids in overlay.items()
+        }
+        self._version, self._checked_at = version, checked_at
+
+    def get_state(self):
+        expired = (
+            time.monotonic() - self._loaded_at > settings.PANTRY_INDEX_TTL
+        )
+        with self._lock:
+            if self._base is None or expired:
+                self.load()
+            else:
+                self.refresh()
+            return self._base, self._overlay
+
+    def search(self, ingredient_ids, limit=20):
+        """
+        [(id рецепта, найдено ингредиентов, всего ингредиентов)]:
+        по убыванию доли найденных, затем по возрастанию недостающих.
+        """
+        (postings, recipe_ids, totals), overlay = self.get_state()
+        pantry = set(ingredient_ids)
+        lists = [postings[pk] for pk in pantry if pk in postings]
+        if lists:
+            candidates, covered = np.unique(
+                np.concatenate(lists), return_counts=True
+            )
+        else:
+            candidates = covered = np.empty(0, dtype=np.int64)
+        total = totals[np.searchsorted(recipe_ids, candidates)]
+        if overlay:
+            keep = ~np.isin(candidates, np.fromiter(overlay, np.int64))
+            extra = [
+                (recipe_id, len(ingredients & pantry), len(ingredients))
+                for recipe_id, ingredients in overlay.items()
+                if ingredients & pantry
+            ]
+            extra = np.array(extra, dtype=np.int64).reshape(-1, 3)
+            candidates = np.concatenate((candidates[keep], extra[:, 0]))
+            covered = np.concatenate((covered[keep], extra[:, 1]))
+            total = np.concatenate((total[keep], extra[:, 2]))
+        order = np.lexsort((-candidates, total - covered, -covered / total))
+        return [
+            (int(candidates[i]), int(covered[i]), int(total[i]))
+            for i in order[:limit]
+        ]
+
+
+pantry_index = PantryIndex()
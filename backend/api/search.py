@@ -0,0 +1,104 @@
+"""
+Полнотекстовый поиск рецептов по названию, описанию и ингредиентам.
+
+На PostgreSQL используются tsvector (веса A — название, B — описание)
+и pg_trgm: индексы создаёт миграция recipes.0009_recipe_search_indexes,
+выражения здесь должны совпадать с выражениями индексов.
+На остальных СУБД (SQLite для локальной разработки) поиск сводится к
+LIKE по каждому слову запроса: все слова должны встретиться хотя бы в
+одном из полей, вес совпадения — 3 за название, 2 за ингредиент, 1 за
+описание. В SQLite LIKE регистронезависим только для латиницы.
+На обеих СУБД рецепты, название которых совпадает с запросом, идут
+первыми, за ними — название начинается с запроса, затем остальные.
+"""
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connection
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+from recipes.models import IngredientAmount, Recipe
+
+SEARCH_CONFIG = 'russian'
+INGREDIENT_MATCH_WEIGHT = 0.3
+
+
+def ingredient_match(text):
+    return Exists(IngredientAmount.objects.filter(
+        recipe=OuterRef('pk'), ingredient__name__icontains=text
+    ))
+
+
+def name_match(text):
+    return Case(
+        When(name__iexact=text, then=Value(2)),
+        When(name__istartswith=text, then=Value(1)),
+        default=Value(0),
+    )
+
+
+def search_recipes(queryset, text):
+    text = text.strip()
+    if not text:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return search_postgres(queryset, text)
+    return search_fallback(queryset, text)
+
+
+def search_postgres(queryset, text):
+    """
+    Кандидаты собираются объединением трёх выборок, каждая из которых
+    идёт по своему GIN-индексу; ранжируются только найденные рецепты.
+    """
+    vector = (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    candidates = Recipe.objects.annotate(
+        search_vector=vector
+    ).filter(
+        search_vector=query
+    ).order_by().values('pk').union(
+        Recipe.objects.filter(name__icontains=text).order_by().values('pk'),
+        IngredientAmount.objects.filter(
+            ingredient__name__icontains=text
+        ).order_by().values('recipe_id'),
+    )
+    return queryset.filter(
+        pk__in=candidates
+    ).annotate(
+        search_rank=(
+            SearchRank(vector, query)
+            + TrigramSimilarity('name', text)
+            + Case(
+                When(ingredient_match(text),
+                     then=Value(INGREDIENT_MATCH_WEIGHT)),
+                default=Value(0.0),
+            )
+        )
+    ).annotate(
+        name_match=name_match(text)
+    ).order_by('-name_match', '-search_rank', '-pub_date', '-id')
+
+
+def search_fallback(queryset, text):
+    rank = Value(0)
+    for number, word in enumerate(text.split()):
+        match = f'ingredient_match_{number}'
+        queryset = queryset.annotate(**{match: ingredient_match(word)}).filter(
+            Q(name__icontains=word)
+            | Q(text__icontains=word)
+            | Q(**{match: True})
+        )
+        rank = rank + Case(
+            When(name__icontains=word, then=Value(3)), default=Value(0)
+        ) + Case(
+            When(**{match: True}, then=Value(2)), default=Value(0)
+        ) + Case(
+            When(text__icontains=word, then=Value(1)), default=Value(0)
+        )
+    return queryset.annotate(
+        search_rank=rank
+    ).annotate(
+        name_match=name_match(text)
+    ).order_by('-name_match', '-search_rank', '-pub_date', '-id')
@@ -1,12 +1,18 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from drf_extra_fields.fields import Base64ImageField
+from foodgram.middleware import TimedSerializerMixin
+from recipes import (counters, images, renditions, shopping_list, similarity,
+                     versions)
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
                             ShoppingCart, Tag)
 from rest_framework import serializers
 from users.serializers import CustomUserSerializer
 
+from .fields import Base64ImageUploadField
 
-class TagSerializer(serializers.ModelSerializer):
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для тегов."""
     class Meta:
         model = Tag
@@ -18,7 +24,7 @@ class TagSerializer(serializers.ModelSerializer):
         ]
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для ингредиентов."""
     class Meta:
         model = Ingredient
@@ -42,7 +48,7 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отображения рецептов"""
     image = Base64ImageField()
     tags = TagSerializer(many=True, read_only=True)
@@ -50,26 +56,46 @@ class RecipeListSerializer(serializers.ModelSerializer):
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart', 'name',
-            'image', 'text', 'cooking_time'
+            'image', 'image_status', 'renditions', 'text', 'cooking_time',
+            'favorites_count', 'carts_count'
         )
+        read_only_fields = ('image_status', 'favorites_count', 'carts_count')
 
     def get_ingredients(self, obj):
-        ingredients = IngredientAmount.objects.filter(recipe=obj)
-        return IngredientAmountSerializer(ingredients, many=True).data
+        return IngredientAmountSerializer(obj.amounts.all(), many=True).data
+
+    def get_renditions(self, obj):
+        request = self.context.get('request')
+        storage = obj.image.storage
+        result = {}
+        for size, entry in (obj.image_renditions or {}).items():
+            result[size] = {'width': entry['width'],
+                            'height': entry['height']}
+            for extension in renditions.FORMATS:
+                url = storage.url(entry[extension])
+                result[size][extension] = (
+                    request.build_absolute_uri(url) if request else url
+                )
+        return result
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return Favorite.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -90,10 +116,9 @@ class AddIngredientSerializer(serializers.ModelSerializer):
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для создания нового рецепта"""
     author = CustomUserSerializer(read_only=True)
-    image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all())
+    image = Base64ImageUploadField()
+    tags = serializers.ListField(
+        child=serializers.IntegerField())
     ingredients = AddIngredientSerializer(
         many=True)
 
@@ -103,70 +128,158 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'text', 'cooking_time', 'id', 'author')
 
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        tags = data.get('tags')
-        ingredients_list = []
-        for ingredient in ingredients:
-            if ingredient['id'] in ingredients_list:
+        """Все ингредиенты и теги проверяются одним запросом на таблицу."""
+        ingredients = data.get('ingredients')
+        if ingredients is not None:
+            ids = [ingredient['id'] for ingredient in ingredients]
+            if len(ids) > len(set(ids)):
                 raise serializers.ValidationError({
                     'detail': 'Игредиенты должны быть уникальными'
                 })
-            ingredients_list.append(ingredient['id'])
-            if int(ingredient['amount']) <= 0:
+            if any(ingredient['amount'] <= 0 for ingredient in ingredients):
                 raise serializers.ValidationError({
                     'detail': 'Количество ингрединета должно быть больше 0'
                 })
-        if len(tags) > len(set(tags)):
-            raise serializers.ValidationError({
-                'detail: Теги должны быть уникальными'})
-        data['ingredients'] = ingredients
-        data['tags'] = tags
+            missing = set(ids) - Ingredient.objects.in_bulk(ids).keys()
+            if missing:
+                raise serializers.ValidationError({
+                    'detail': f'Ингредиенты не найдены: {sorted(missing)}'
+                })
+        tags = data.get('tags')
+        if tags is not None:
+            if len(tags) > len(set(tags)):
+                raise serializers.ValidationError({
+                    'detail': 'Теги должны быть уникальными'
+                })
+            found = Tag.objects.in_bulk(tags)
+            missing = set(tags) - found.keys()
+            if missing:
+                raise serializers.ValidationError({
+                    'detail': f'Теги не найдены: {sorted(missing)}'
+                })
+            data['tags'] = [found[pk] for pk in tags]
         return data
 
     def create_ingredients(self, ingredients, recipe):
         bulk_ingredient_list = [
             IngredientAmount(
                 recipe=recipe,
-                ingredient=get_object_or_404(
-                    Ingredient, pk=ingredient_data['id']),
+                ingredient_id=ingredient_data['id'],
                 amount=ingredient_data['amount']
             )
             for ingredient_data in ingredients
         ]
         IngredientAmount.objects.bulk_create(bulk_ingredient_list)
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """
+        Применяет к рецепту только изменения состава и возвращает их
+        как {ingredient_id: изменение количества}.
+        """
+        current = {item.ingredient_id: item for item in recipe.amounts.all()}
+        new = {item['id']: item['amount'] for item in ingredients}
+        added, changed, delta = [], [], {}
+        for ingredient_id, amount in new.items():
+            item = current.get(ingredient_id)
+            if item is None:
+                added.append(IngredientAmount(
+                    recipe=recipe, ingredient_id=ingredient_id, amount=amount
+                ))
+                delta[ingredient_id] = amount
+            elif item.amount != amount:
+                delta[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        removed = [
+            item for ingredient_id, item in current.items()
+            if ingredient_id not in new
+        ]
+        for item in removed:
+            delta[item.ingredient_id] = -item.amount
+        if removed:
+            IngredientAmount.objects.filter(
+                pk__in=[item.pk for item in removed]
+            ).delete()
+        IngredientAmount.objects.bulk_update(changed, ['amount'])
+        IngredientAmount.objects.bulk_create(added)
+        return delta
+
+    @staticmethod
+    def update_tags(recipe, tags):
+        current = {tag.pk for tag in recipe.tags.all()}
+        new = {tag.pk for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         validated_data['author'] = self.context.get('request').user
         recipe = super().create(validated_data)
         self.create_ingredients(ingredients, recipe)
+        similarity.update([recipe.id])
+        versions.bump(versions.RECIPE_INGREDIENTS)
         recipe.tags.set(tags)
+        images.schedule(recipe)
+        # Новый рецепт ещё ни у кого не в избранном и не в корзине, а на
+        # себя подписаться нельзя: флаги не нужно проверять запросами.
+        recipe.is_favorited = recipe.is_in_shopping_cart = False
+        recipe.author.is_subscribed = False
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
-        )
-        instance.tags.clear()
-        tags_data = self.initial_data.get('tags')
-        instance.tags.set(tags_data)
-        IngredientAmount.objects.filter(recipe=instance).all().delete()
-        self.create_ingredients(validated_data.get('ingredients'), instance)
-        instance.save()
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        image = validated_data.get('image')
+        if image and images.is_current(instance, image):
+            del validated_data['image']
+        instance = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            images.schedule(instance)
+        if tags is not None:
+            self.update_tags(instance, tags)
+        if ingredients is not None:
+            composition_changed = {
+                item['id'] for item in ingredients
+            } != {item.ingredient_id for item in instance.amounts.all()}
+            shopping_list.change_recipe(
+                instance, self.update_ingredients(instance, ingredients)
+            )
+            if composition_changed:
+                similarity.update([instance.id])
+                versions.bump(versions.RECIPE_INGREDIENTS)
         return instance
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                'amounts',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+            ),
+            'tags',
+        )
         return RecipeListSerializer(instance,
                                     context=context).data
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class BulkRecipesSerializer(serializers.Serializer):
+    """Список id рецептов для массовых операций."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+
+
+class ShortRecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для краткого рецепта."""
     class Meta:
         model = Recipe
@@ -190,6 +303,12 @@ class FavoriteSerializer(serializers.ModelSerializer):
             })
         return data
 
+    @transaction.atomic
+    def create(self, validated_data):
+        favorite = super().create(validated_data)
+        counters.favorites([favorite.recipe_id], 1)
+        return favorite
+
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
@@ -205,6 +324,13 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         model = ShoppingCart
         fields = ('user', 'recipe')
 
+    @transaction.atomic
+    def create(self, validated_data):
+        cart = super().create(validated_data)
+        shopping_list.add_recipes(cart.user_id, [cart.recipe_id])
+        counters.carts([cart.recipe_id], 1)
+        return cart
+
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
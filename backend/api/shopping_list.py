@@ -0,0 +1,90 @@
+import csv
+import io
+import os
+
+from django.conf import settings
+from recipes.models import ShoppingListItem
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+TITLE = 'Список покупок с сайта Foodgram:'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FALLBACK_FONT = 'Helvetica'
+
+
+def get_shopping_list(user):
+    """Сводный список ингредиентов из корзины, см. recipes.shopping_list."""
+    return ShoppingListItem.objects.filter(
+        user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('ingredient__name')
+
+
+def iter_text(items):
+    yield f'{TITLE}\n\n'
+    for item in items:
+        yield (
+            f'{item["ingredient__name"]}, {item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}\n'
+        )
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+    def write(self, value):
+        return value
+
+
+def iter_csv(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for item in items:
+        yield writer.writerow((
+            item['ingredient__name'],
+            item['amount'],
+            item['ingredient__measurement_unit'],
+        ))
+
+
+def get_pdf_font():
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    if not os.path.exists(settings.SHOPPING_LIST_PDF_FONT):
+        return PDF_FALLBACK_FONT
+    pdfmetrics.registerFont(
+        TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+    )
+    return PDF_FONT_NAME
+
+
+def render_pdf(items):
+    """
+    PDF собирается целиком в памяти: reportlab не умеет
+    отдавать документ по частям.
+    """
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    font = get_pdf_font()
+    width, height = A4
+    margin, line_height = 50, 18
+    page.setFont(font, 16)
+    page.drawString(margin, height - margin, TITLE)
+    y = height - margin - 2 * line_height
+    page.setFont(font, 12)
+    for item in items:
+        if y < margin:
+            page.showPage()
+            page.setFont(font, 12)
+            y = height - margin
+        page.drawString(
+            margin, y,
+            f'• {item["ingredient__name"]}, {item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}'
+        )
+        y -= line_height
+    page.save()
+    return buffer.getvalue()
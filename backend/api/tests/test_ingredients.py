@@ -0,0 +1,29 @@
+from api.ingredient_index import ingredient_index
+from recipes import versions
+from recipes.models import Ingredient
+from rest_framework.test import APITestCase
+
+
+class IngredientIndexVersionTests(APITestCase):
+    """Ответ списка ингредиентов соответствует своему ETag."""
+
+    def setUp(self):
+        # Версии откатываются вместе с транзакцией теста, снимок — нет.
+        ingredient_index.invalidate()
+
+    def test_bulk_import_from_other_process_is_visible(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        first = self.client.get('/api/ingredients/', {'name': 'с'})
+        self.assertEqual(len(first.json()), 1)
+        # Как load_ingrs: bulk_create без сигналов и явный bump().
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='сахар', measurement_unit='г')]
+        )
+        versions.bump(versions.INGREDIENTS)
+        second = self.client.get('/api/ingredients/', {'name': 'с'},
+                                 HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(
+            [item['name'] for item in second.json()], ['сахар', 'соль']
+        )
@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from rest_framework.test import APITestCase
+from users.models import Follow, User
+
+PAGE_SIZES = (1, 5, 20)
+
+
+class RecipeQueryCountTests(APITestCase):
+    """Число запросов к БД не зависит от размера страницы и рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='Reader', last_name='Reader',
+        )
+        authors = [
+            User.objects.create(
+                username=f'author{i}', email=f'author{i}@example.com',
+                first_name='Author', last_name=str(i),
+            )
+            for i in range(5)
+        ]
+        tags = [
+            Tag.objects.create(name=f'tag{i}', color='#000000', slug=f't{i}')
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=f'ingredient{i}',
+                                      measurement_unit='г')
+            for i in range(10)
+        ]
+        cls.recipes = []
+        for i in range(max(PAGE_SIZES)):
+            recipe = Recipe.objects.create(
+                author=authors[i % len(authors)],
+                name=f'recipe{i}',
+                image='static/recipe/recipe.jpg',
+                text='text',
+                cooking_time=10,
+            )
+            recipe.tags.set(tags[:i % len(tags) + 1])
+            IngredientAmount.objects.bulk_create(
+                IngredientAmount(recipe=recipe, ingredient=ingredient,
+                                 amount=1)
+                for ingredient in ingredients[:i % len(ingredients) + 1]
+            )
+            cls.recipes.append(recipe)
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        for author in authors[::2]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant(self, urls):
+        expected = self.count_queries(urls[0])
+        for url in urls[1:]:
+            with self.subTest(url=url), self.assertNumQueries(expected):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_list_anonymous(self):
+        self.assert_constant(
+            [f'/api/recipes/?limit={size}' for size in PAGE_SIZES]
+        )
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_constant(
+            [f'/api/recipes/?limit={size}' for size in PAGE_SIZES]
+        )
+
+    def test_list_page_contents(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f'/api/recipes/?limit={max(PAGE_SIZES)}')
+        results = response.json()['results']
+        self.assertEqual(len(results), max(PAGE_SIZES))
+        favorited = {recipe.pk for recipe in self.recipes[::2]}
+        for result in results:
+            self.assertEqual(result['is_favorited'], result['id'] in favorited)
+            self.assertEqual(result['is_in_shopping_cart'],
+                             result['id'] in favorited)
+
+    def test_detail_anonymous(self):
+        self.assert_constant(
+            [f'/api/recipes/{recipe.pk}/' for recipe in self.recipes[:10]]
+        )
+
+    def test_detail_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_constant(
+            [f'/api/recipes/{recipe.pk}/' for recipe in self.recipes[:10]]
+        )
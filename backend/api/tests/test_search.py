@@ -0,0 +1,57 @@
+from api.search import search_fallback
+from recipes.models import Ingredient, IngredientAmount, Recipe
+from rest_framework.test import APITestCase
+from users.models import User
+
+
+class RecipeSearchRankingTests(APITestCase):
+    """Точное совпадение названия выше совпадения по началу и вхождению."""
+
+    # Рецепты создаются от лучшего совпадения к худшему, поэтому
+    # сортировка по -pub_date без учёта совпадения дала бы обратный порядок.
+    EXPECTED = [
+        'Borscht',
+        'Borscht with beans',
+        'Green borscht',
+        'Beet soup',
+        'Cabbage soup',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='Author', last_name='Author',
+        )
+        texts = {'Cabbage soup': 'Not quite a borscht.'}
+        for name in cls.EXPECTED + ['Pancakes']:
+            Recipe.objects.create(
+                author=author, name=name, image='static/recipe/recipe.jpg',
+                text=texts.get(name, 'Text.'), cooking_time=10,
+            )
+        IngredientAmount.objects.create(
+            recipe=Recipe.objects.get(name='Beet soup'),
+            ingredient=Ingredient.objects.create(
+                name='borscht dressing', measurement_unit='г'
+            ),
+            amount=1,
+        )
+
+    def search(self, text):
+        response = self.client.get('/api/recipes/',
+                                   {'search': text, 'limit': 20})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_exact_then_prefix_then_substring(self):
+        self.assertEqual(self.search('borscht'), self.EXPECTED)
+
+    def test_case_and_whitespace_ignored(self):
+        self.assertEqual(self.search('  BORSCHT '), self.EXPECTED)
+
+    def test_fallback_gives_same_order(self):
+        """Запасной поиск даёт тот же фиксированный порядок, что и API."""
+        names = search_fallback(
+            Recipe.objects.all(), 'borscht'
+        ).values_list('name', flat=True)
+        self.assertEqual(list(names), self.EXPECTED)
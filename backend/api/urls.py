@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import IngredientsViewSet, RecipeViewSet, TagsViewSet
 
 router = DefaultRouter()
@@ -11,3 +13,15 @@ router.register('tags', TagsViewSet, basename='tags')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('tags/', async_views.tag_list),
+        path('tags/<int:pk>/', async_views.tag_detail),
+        path('ingredients/', async_views.ingredient_list),
+        path('ingredients/<int:pk>/', async_views.ingredient_detail),
+        path(
+            'recipes/download_shopping_cart/',
+            async_views.download_shopping_cart
+        ),
+    ] + urlpatterns
@@ -1,7 +1,11 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from recipes import (bulk, counters, shopping_list, similarity, timeline,
+                     trending, versions)
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
                             ShoppingCart, Tag)
 from rest_framework import status
@@ -9,13 +13,22 @@ from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from users.models import Follow, User
 from users.permissions import IsAuthorOrReadOnly
 
-from .filters import IngredientSearchFilter, RecipeFilter
-from .pagination import CustomPagination
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeListSerializer, RecipeSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+from .conditional import catalog_stamp, conditional, recipe_stamp
+from .filters import IngredientSearchFilter, RecipeFilter, RecipeOrderingFilter
+from .ingredient_index import ingredient_index
+from .pagination import CursorAwarePagination, MergedKeysetPagination
+from .pantry_index import pantry_index
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from .serializers import (BulkRecipesSerializer, FavoriteSerializer,
+                          IngredientSerializer, RecipeListSerializer,
+                          RecipeSerializer, ShoppingCartSerializer,
+                          ShortRecipeSerializer, TagSerializer)
+from .shopping_list import get_shopping_list, iter_csv, iter_text, render_pdf
+
+SHOPPING_LIST_STREAMS = {'txt': iter_text, 'csv': iter_csv}
 
 
 class TagsViewSet(ReadOnlyModelViewSet):
@@ -25,6 +38,14 @@ class TagsViewSet(ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    @conditional(catalog_stamp(versions.TAGS))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional(catalog_stamp(versions.TAGS))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientsViewSet(ReadOnlyModelViewSet):
     """ViewSet для ингредиентов."""
@@ -35,22 +56,83 @@ class IngredientsViewSet(ReadOnlyModelViewSet):
     search_fields = ('^name',)
     pagination_class = None
 
+    @conditional(catalog_stamp(versions.INGREDIENTS))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional(catalog_stamp(versions.INGREDIENTS))
+    def list(self, request, *args, **kwargs):
+        """
+        Поиск по ?name= идёт по индексу в памяти без обращения к БД;
+        ?limit= ограничивает число результатов.
+        """
+        if not settings.INGREDIENT_INDEX_ENABLED:
+            return super().list(request, *args, **kwargs)
+        try:
+            limit = max(int(request.query_params['limit']), 1)
+        except (KeyError, ValueError):
+            limit = None
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''), limit=limit
+        ))
+
 
 class RecipeViewSet(ModelViewSet):
     """ViewSet для работы с рецептами."""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.select_related('author').prefetch_related(
+        Prefetch(
+            'amounts',
+            queryset=IngredientAmount.objects.select_related('ingredient')
+        ),
+        'tags',
+    )
     permission_classes = [IsAuthorOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, RecipeOrderingFilter]
     filterset_class = RecipeFilter
-    pagination_class = CustomPagination
+    pagination_class = CursorAwarePagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        authors = User.objects.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            )
+        )
+        return queryset.select_related(None).prefetch_related(
+            Prefetch('author', queryset=authors)
+        ).annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeListSerializer
         return RecipeSerializer
 
+    @conditional(recipe_stamp)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        counters.recipes([recipe.author_id], 1)
+        timeline.fan_out(recipe)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        shopping_list.discard_recipe(instance)
+        counters.recipes([instance.author_id], -1)
+        versions.bump(versions.RECIPE_INGREDIENTS)
+        instance.delete()
 
     @staticmethod
     def post_method_for_actions(request, pk, serializers):
@@ -62,9 +144,8 @@ class RecipeViewSet(ModelViewSet):
 
     @staticmethod
     def delete_method_for_actions(request, pk, model):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        model_obj = get_object_or_404(model, user=user, recipe=recipe)
+        model_obj = get_object_or_404(model, user=request.user, recipe_id=pk)
+        trending.discard(model_obj)
         model_obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -75,7 +156,9 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, serializers=FavoriteSerializer)
 
     @favorite.mapping.delete
+    @transaction.atomic
     def delete_favorite(self, request, pk):
+        counters.favorites([pk], -1)
         return self.delete_method_for_actions(
             request=request, pk=pk, model=Favorite)
 
@@ -86,31 +169,150 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, serializers=ShoppingCartSerializer)
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def delete_shopping_cart(self, request, pk):
+        shopping_list.remove_recipes(request.user.id, [pk])
+        counters.carts([pk], -1)
         return self.delete_method_for_actions(
             request=request, pk=pk, model=ShoppingCart)
 
+    @staticmethod
+    def bulk_ids(request, required=True):
+        if not required and not request.data:
+            return None
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['ids']
+
+    @action(detail=False, methods=["POST"], url_path='favorite',
+            url_name='favorite-bulk', permission_classes=[IsAuthenticated])
+    def bulk_favorite(self, request):
+        """Добавляет в избранное рецепты из {"ids": [...]}."""
+        results = bulk.add(Favorite, request.user.id, self.bulk_ids(request))
+        return Response({'results': results})
+
+    @bulk_favorite.mapping.delete
+    def bulk_delete_favorite(self, request):
+        results = bulk.remove(
+            Favorite, request.user.id, self.bulk_ids(request)
+        )
+        return Response({'results': results})
+
+    @action(detail=False, methods=["POST"], url_path='shopping_cart',
+            url_name='shopping-cart-bulk',
+            permission_classes=[IsAuthenticated])
+    def bulk_shopping_cart(self, request):
+        """Добавляет в корзину рецепты из {"ids": [...]}."""
+        results = bulk.add(
+            ShoppingCart, request.user.id, self.bulk_ids(request)
+        )
+        return Response({'results': results})
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_delete_shopping_cart(self, request):
+        """Удаляет рецепты из {"ids": [...]}; без тела очищает корзину."""
+        results = bulk.remove(
+            ShoppingCart, request.user.id,
+            self.bulk_ids(request, required=False)
+        )
+        return Response({'results': results})
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        """Рецепты с похожим набором ингредиентов, ?limit= до 50."""
+        get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        scores = similarity.similar(pk, limit)
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for recipe_id, _ in scores]
+        )
+        context = self.get_serializer_context()
+        return Response([
+            {
+                **ShortRecipeSerializer(recipes[recipe_id],
+                                        context=context).data,
+                'similarity': round(score, 3),
+            }
+            for recipe_id, score in scores if recipe_id in recipes
+        ])
+
+    @action(detail=False)
+    def pantry(self, request):
+        """
+        Рецепты из имеющихся ингредиентов: ?ingredients=1,2,3&limit=20.
+        Сначала с наибольшей долей имеющихся, затем с меньшим числом
+        недостающих.
+        """
+        try:
+            ingredient_ids = {
+                int(value)
+                for param in request.query_params.getlist('ingredients')
+                for value in param.split(',') if value.strip()
+            }
+            limit = min(max(int(request.query_params.get('limit', 20)), 1),
+                        100)
+        except ValueError:
+            ingredient_ids = None
+        if not ingredient_ids or len(ingredient_ids) > 100:
+            return Response(
+                {'ingredients': 'Укажите от 1 до 100 id ингредиентов '
+                                'через запятую'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        found = pantry_index.search(ingredient_ids, limit)
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for recipe_id, _, _ in found]
+        )
+        context = self.get_serializer_context()
+        return Response([
+            {
+                **ShortRecipeSerializer(recipes[recipe_id],
+                                        context=context).data,
+                'coverage': round(covered / total, 3),
+                'missing': total - covered,
+            }
+            for recipe_id, covered, total in found if recipe_id in recipes
+        ])
+
     @action(detail=False, permission_classes=[IsAuthenticated])
-    def download_shopping_cart(self, request):
-        shopping_cart = ShoppingCart.objects.filter(user=self.request.user)
-        recipes = [item.recipe.id for item in shopping_cart]
-        buy_list = IngredientAmount.objects.filter(
-            recipe__in=recipes
-        ).values(
-            'ingredient'
-        ).annotate(
-            amount=Sum('amount')
+    def feed(self, request):
+        """Новые рецепты авторов из подписок, постранично по ?cursor=."""
+        paginator = MergedKeysetPagination()
+        page = paginator.paginate_queryset(
+            timeline.feed_sources(request.user), request, self
         )
-        buy_list_text = 'Список покупок с сайта Foodgram:\n\n'
-        for item in buy_list:
-            ingredient = Ingredient.objects.get(pk=item['ingredient'])
-            amount = item['amount']
-            buy_list_text += (
-                f'{ingredient.name}, {amount} '
-                f'{ingredient.measurement_unit}\n'
+        ids = [item['recipe_id'] for item in page]
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = RecipeListSerializer(
+            [recipes[pk] for pk in ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated],
+            renderer_classes=[PlainTextRenderer, CSVRenderer, PDFRenderer])
+    def download_shopping_cart(self, request):
+        """
+        Список покупок в формате txt (по умолчанию), csv или pdf,
+        выбирается через ?format= или заголовок Accept.
+        """
+        items = get_shopping_list(request.user)
+        renderer = request.accepted_renderer
+        if renderer.format == 'pdf':
+            response = HttpResponse(
+                render_pdf(items), content_type=renderer.media_type
+            )
+        else:
+            stream = SHOPPING_LIST_STREAMS[renderer.format]
+            response = StreamingHttpResponse(
+                stream(items.iterator()),
+                content_type=f'{renderer.media_type}; charset=utf-8'
             )
-        response = HttpResponse(buy_list_text, content_type="text/plain")
         response['Content-Disposition'] = (
-            'attachment; filename=shopping-list.txt'
+            f'attachment; filename=shopping-list.{renderer.format}'
         )
         return response
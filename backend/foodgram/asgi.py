@@ -0,0 +1,60 @@
+"""
+ASGI config for foodgram project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Enables the async views for catalogs and the shopping list download, e.g.:
+
+    gunicorn foodgram.asgi -k uvicorn.workers.UvicornWorker -w 4
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+import django
+from django.core.handlers import asgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    Отдаёт async_streaming_content потоковых ответов api.async_views.
+    Ответ закрывает поток, который его читал, поэтому здесь он
+    повторно не закрывается.
+    """
+    async def send_response(self, response, send):
+        chunks = getattr(response, 'async_streaming_content', None)
+        if chunks is None:
+            await super().send_response(response, send)
+            return
+        response_headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            response_headers.append((
+                b'Set-Cookie', cookie.output(header='').encode('ascii').strip()
+            ))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers,
+        })
+        try:
+            async for part in chunks:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            await chunks.aclose()
+        await send({'type': 'http.response.body'})
+
+
+django.setup(set_prefix=False)
+application = ASGIHandler()
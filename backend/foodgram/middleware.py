@@ -0,0 +1,195 @@
+"""
+Метрики запроса: число SQL-запросов, время в БД, в сериализаторах
+и в представлении.
+
+При SERVER_TIMING они отдаются заголовком Server-Timing. Запросы
+дольше SLOW_REQUEST_MS или с числом SQL-запросов больше
+SLOW_REQUEST_QUERIES пишутся в лог foodgram.slow_requests одной
+JSON-строкой вместе с самыми частыми повторяющимися запросами.
+
+Запросы к БД учитываются обёрткой, которая ставится на каждое
+соединение, а метрики текущего запроса берутся из contextvar. Поэтому
+учитываются и запросы из потоков, куда asgiref копирует контекст
+(синхронные представления под ASGI, sync_to_async). Время сериализации
+считают сериализаторы ответов с TimedSerializerMixin.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger('foodgram.slow_requests')
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_time = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializer_depth = 0
+        self.statements = defaultdict(lambda: [0, 0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_time += elapsed
+            statement = self.statements[sql]
+            statement[0] += 1
+            statement[1] += elapsed
+
+    @property
+    def queries(self):
+        return sum(count for count, _ in self.statements.values())
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def duplicates(self, limit):
+        repeated = sorted(
+            ((count, elapsed, sql)
+             for sql, (count, elapsed) in self.statements.items()
+             if count > 1),
+            reverse=True
+        )
+        return [
+            {'sql': sql, 'count': count, 'ms': round(elapsed * 1000, 2)}
+            for count, elapsed, sql in repeated[:limit]
+        ]
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+class TimedSerializerMixin:
+    """
+    Учитывает время to_representation в метриках текущего запроса.
+    Подмешивается к сериализаторам ответов; вложенные сериализаторы с
+    этим миксином считаются один раз.
+    """
+
+    def to_representation(self, instance):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_view(request, view_func, view_args, view_kwargs):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.view_started = time.perf_counter()
+
+
+async def astart_view(request, view_func, view_args, view_kwargs):
+    start_view(request, view_func, view_args, view_kwargs)
+
+
+def log_slow(request, response, metrics):
+    total_time = metrics.total_time
+    if not settings.SLOW_REQUEST_MS or (
+            total_time * 1000 < settings.SLOW_REQUEST_MS
+            and metrics.queries <= settings.SLOW_REQUEST_QUERIES):
+        return
+    match = request.resolver_match
+    logger.warning(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'total_ms': round(total_time * 1000, 2),
+        'view_ms': round(metrics.view_time * 1000, 2),
+        'db_ms': round(metrics.db_time * 1000, 2),
+        'serializer_ms': round(metrics.serializer_time * 1000, 2),
+        'queries': metrics.queries,
+        'duplicates': metrics.duplicates(settings.SLOW_REQUEST_TOP_SQL),
+    }, ensure_ascii=False))
+
+
+def finish(request, response, metrics):
+    if metrics.view_started is not None:
+        metrics.view_time = time.perf_counter() - metrics.view_started
+    if settings.SERVER_TIMING:
+        response['Server-Timing'] = metrics.server_timing()
+    log_slow(request, response, metrics)
+    return response
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    """
+    Синхронный или асинхронный вариант выбирается по get_response, чтобы
+    под ASGI цепочка не уходила в общий синхронный поток.
+    """
+    for connection in connections.all():
+        instrument_connection(connection)
+    enabled = settings.SERVER_TIMING or settings.SLOW_REQUEST_MS
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not enabled:
+                return await get_response(request)
+            metrics = RequestMetrics()
+            token = current_metrics.set(metrics)
+            try:
+                response = await get_response(request)
+            finally:
+                current_metrics.reset(token)
+            return finish(request, response, metrics)
+
+        middleware.process_view = astart_view
+        return middleware
+
+    def middleware(request):
+        if not enabled:
+            return get_response(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return finish(request, response, metrics)
+
+    middleware.process_view = start_view
+    return middleware
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.admin import display
 
-from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                     ShoppingCart, Tag)
+from . import images
+from .models import (Favorite, Ingredient, IngredientAmount, Job, Recipe,
+                     ShoppingCart, ShoppingListItem, Tag)
 
 
 class IngredientInline(admin.TabularInline):
@@ -26,16 +27,23 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'id', 'author', 'added_in_favorites')
-    readonly_fields = ('added_in_favorites',)
+    readonly_fields = ('added_in_favorites', 'favorites_count',
+                       'carts_count', 'trending_score', 'image_status',
+                       'image_renditions')
     search_fields = ('name', 'tags__name', 'author__username',)
     list_filter = ('author', 'name', 'tags',)
     inlines = [
         IngredientInline,
     ]
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            images.schedule(obj)
+
     @display(description='Количество в избранных')
     def added_in_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 @admin.register(Favorite)
@@ -48,3 +56,17 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     empty_value_display = '-пусто-'
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'amount')
+    empty_value_display = '-пусто-'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after',
+                    'locked_by')
+    list_filter = ('kind', 'status')
+    empty_value_display = '-пусто-'
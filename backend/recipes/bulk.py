@@ -0,0 +1,84 @@
+"""
+Массовое добавление и удаление рецептов в избранном и корзине.
+
+Строка пользователя блокируется на время операции, поэтому результат
+по каждому id точен и счётчики не расходятся при параллельных
+запросах одного пользователя. Вставка — один bulk_create
+с ignore_conflicts, удаление — один DELETE ... WHERE recipe_id IN.
+"""
+from django.db import transaction
+from users.models import User
+
+from . import counters, shopping_list, trending
+from .models import Favorite, Recipe, ShoppingCart
+
+ADDED = 'added'
+EXISTS = 'exists'
+REMOVED = 'removed'
+NOT_FOUND = 'not_found'
+
+
+def lock_user(user_id):
+    list(User.objects.select_for_update().filter(
+        pk=user_id
+    ).values_list('pk', flat=True))
+
+
+def after_add(model, user_id, recipe_ids):
+    if model is ShoppingCart:
+        shopping_list.add_recipes(user_id, recipe_ids)
+        counters.carts(recipe_ids, 1)
+    elif model is Favorite:
+        counters.favorites(recipe_ids, 1)
+
+
+def after_remove(model, user_id, recipe_ids):
+    if model is ShoppingCart:
+        shopping_list.remove_recipes(user_id, recipe_ids)
+        counters.carts(recipe_ids, -1)
+    elif model is Favorite:
+        counters.favorites(recipe_ids, -1)
+
+
+def add(model, user_id, recipe_ids):
+    """Добавляет рецепты; возвращает {id: added | exists | not_found}."""
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    with transaction.atomic():
+        lock_user(user_id)
+        found = set(Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('pk', flat=True))
+        present = set(model.objects.filter(
+            user_id=user_id, recipe_id__in=found
+        ).values_list('recipe_id', flat=True))
+        new = [pk for pk in recipe_ids if pk in found - present]
+        model.objects.bulk_create(
+            [model(user_id=user_id, recipe_id=pk) for pk in new],
+            ignore_conflicts=True
+        )
+        after_add(model, user_id, new)
+    return {
+        pk: ADDED if pk in new else EXISTS if pk in present else NOT_FOUND
+        for pk in recipe_ids
+    }
+
+
+def remove(model, user_id, recipe_ids=None):
+    """
+    Удаляет рецепты (все, если recipe_ids не задан);
+    возвращает {id: removed | not_found}.
+    """
+    with transaction.atomic():
+        lock_user(user_id)
+        entries = model.objects.filter(user_id=user_id)
+        if recipe_ids is not None:
+            entries = entries.filter(recipe_id__in=recipe_ids)
+        events = list(entries.values_list('recipe_id', 'created'))
+        removed = [recipe_id for recipe_id, _ in events]
+        if removed:
+            entries.delete()
+            trending.discard_many(model, events)
+            after_remove(model, user_id, removed)
+    result = dict.fromkeys(recipe_ids or (), NOT_FOUND)
+    result.update(dict.fromkeys(removed, REMOVED))
+    return result
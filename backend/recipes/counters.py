@@ -0,0 +1,77 @@
+"""
+Счётчики популярности: Recipe.favorites_count и carts_count,
+User.recipes_count и followers_count.
+
+Обновляются атомарно через F() в тех же транзакциях, что и сами связи.
+Изменения в обход API (админка, каскадное удаление пользователя)
+исправляет команда reconcile_counters.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from users.models import Follow, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+
+def change(model, pks, field, delta):
+    """Прибавляет delta к счётчику field у объектов pks, не ниже нуля."""
+    if delta:
+        model.objects.filter(pk__in=pks).update(
+            **{field: Greatest(F(field) + delta, 0)}
+        )
+
+
+def favorites(recipe_ids, delta):
+    change(Recipe, recipe_ids, 'favorites_count', delta)
+
+
+def carts(recipe_ids, delta):
+    change(Recipe, recipe_ids, 'carts_count', delta)
+
+
+def recipes(user_ids, delta):
+    change(User, user_ids, 'recipes_count', delta)
+
+
+def followers(user_ids, delta):
+    change(User, user_ids, 'followers_count', delta)
+
+
+def actual_count(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def reconcile(fix=True):
+    """
+    Сверяет счётчики с таблицами связей.
+    Возвращает {'Модель.поле': число расхождений}.
+    """
+    report = {}
+    for model, field, source, source_field in COUNTERS:
+        stale = model.objects.annotate(
+            actual=actual_count(source, source_field)
+        ).exclude(**{field: F('actual')})
+        label = f'{model.__name__}.{field}'
+        if not fix:
+            report[label] = stale.count()
+            continue
+        report[label] = model.objects.filter(
+            pk__in=stale.values('pk')
+        ).update(**{field: actual_count(source, source_field)})
+    return report
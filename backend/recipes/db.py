@@ -0,0 +1,59 @@
+import io
+import json
+from contextlib import contextmanager
+
+from django.db import connection
+
+COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r',
+})
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bytes):
+        return f'\\\\x{value.hex()}'
+    return str(value).translate(COPY_ESCAPES)
+
+
+@contextmanager
+def explicit_dates(model, fields):
+    """
+    Отключает auto_now и auto_now_add у полей из fields, иначе
+    bulk_create заменит переданные значения текущим временем.
+    """
+    auto = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in map(model._meta.get_field, fields)
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in auto:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in auto:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def copy_rows(model, fields, rows):
+    """Вставка строк: COPY на PostgreSQL, bulk_create на остальных."""
+    if connection.vendor != 'postgresql':
+        with explicit_dates(model, fields):
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in rows],
+                batch_size=5000
+            )
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = [model._meta.get_field(field).column for field in fields]
+    with connection.cursor() as cursor:
+        cursor.copy_from(buffer, model._meta.db_table, columns=columns)
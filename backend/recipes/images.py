@@ -0,0 +1,102 @@
+"""
+Обработка загруженных изображений рецептов в фоне.
+
+API сохраняет исходный файл как есть и ставит задачу PROCESS_IMAGE.
+Обработчик проверяет изображение, поворачивает по EXIF, удаляет
+метаданные, ограничивает размер и создаёт уменьшенные копии.
+Обработанный файл получает новое имя по содержимому, исходный
+удаляет gc_images.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import jobs, renditions
+from .models import Recipe
+
+PROCESS_IMAGE = 'process_recipe_image'
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'GIF': {},
+}
+
+
+def schedule(recipe):
+    """
+    Ставит обработку изображения в очередь текущей транзакции.
+    Уже обработанный файл другого рецепта используется как есть.
+    """
+    processed = Recipe.objects.filter(
+        image=recipe.image.name, image_status=Recipe.IMAGE_READY
+    ).exclude(pk=recipe.pk).values_list('image_renditions', flat=True)
+    for image_renditions in processed[:1]:
+        recipe.image_status = Recipe.IMAGE_READY
+        recipe.image_renditions = image_renditions
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image_status=Recipe.IMAGE_READY,
+            image_renditions=image_renditions
+        )
+        return
+    recipe.image_status = Recipe.IMAGE_PENDING
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_status=Recipe.IMAGE_PENDING
+    )
+    jobs.enqueue(PROCESS_IMAGE, recipe_id=recipe.pk, image=recipe.image.name)
+
+
+def is_current(recipe, upload):
+    """Совпадает ли загруженный файл с текущим изображением рецепта."""
+    if not recipe.image:
+        return False
+    field = recipe.image.field
+    name = field.generate_filename(recipe, upload.name)
+    return field.storage.content_name(name, upload) == recipe.image.name
+
+
+def normalize(data):
+    """Изображение без метаданных, повёрнутое по EXIF и не больше лимита."""
+    try:
+        image = Image.open(BytesIO(data))
+        image_format = image.format
+        image.load()
+    except (UnidentifiedImageError, OSError) as error:
+        raise jobs.PermanentError(f'Некорректное изображение: {error}')
+    image = ImageOps.exif_transpose(image)
+    limit = settings.RECIPE_IMAGE_MAX_SIZE
+    image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+    if image_format not in SAVE_OPTIONS:
+        raise jobs.PermanentError(f'Неподдерживаемый формат {image_format}')
+    if image_format == 'JPEG':
+        image = renditions.flatten(image)
+    buffer = BytesIO()
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+@jobs.handler(PROCESS_IMAGE)
+def process_image(recipe_id, image):
+    recipe = Recipe.objects.filter(pk=recipe_id, image=image).first()
+    if recipe is None:
+        return
+    storage = recipe.image.storage
+    with storage.open(image) as source:
+        data = source.read()
+    try:
+        normalized = normalize(data)
+    except jobs.PermanentError:
+        Recipe.objects.filter(pk=recipe_id, image=image).update(
+            image_status=Recipe.IMAGE_FAILED, updated_at=timezone.now()
+        )
+        raise
+    name = storage.save(image, ContentFile(normalized))
+    Recipe.objects.filter(pk=recipe_id, image=image).update(
+        image=name,
+        image_renditions=renditions.render(name, storage),
+        image_status=Recipe.IMAGE_READY,
+        updated_at=timezone.now(),
+    )
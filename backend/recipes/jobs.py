@@ -0,0 +1,113 @@
+"""
+Очередь фоновых задач в таблице Job.
+
+Задача создаётся в той же транзакции, что и данные, поэтому обработчик
+увидит её только после фиксации. Обработчики регистрируются через
+@handler(kind) и выполняются командой run_jobs; несколько процессов
+run_jobs разбирают очередь параллельно. Успешные задачи удаляются,
+после JOB_MAX_ATTEMPTS неудач задача остаётся со статусом failed.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class PermanentError(Exception):
+    """Ошибка, которую повтор не исправит."""
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, **payload):
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def available(kinds=None):
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    jobs = Job.objects.filter(
+        Q(status=Job.PENDING, run_after__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    )
+    if kinds:
+        jobs = jobs.filter(kind__in=kinds)
+    return jobs.order_by('run_after', 'id')
+
+
+def claim(worker, kinds=None):
+    """
+    Берёт одну задачу. На PostgreSQL через SKIP LOCKED, иначе условным
+    UPDATE: задачу получает тот, чей UPDATE изменил строку.
+    """
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = available(kinds).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status, job.locked_by, job.locked_at = (
+                Job.RUNNING, worker, now
+            )
+            job.save(update_fields=['status', 'locked_by', 'locked_at'])
+            return job
+    for job in available(kinds)[:10]:
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, locked_at=job.locked_at
+        ).update(status=Job.RUNNING, locked_by=worker, locked_at=now)
+        if claimed:
+            job.status, job.locked_by, job.locked_at = (
+                Job.RUNNING, worker, now
+            )
+            return job
+    return None
+
+
+def run(job):
+    """Выполняет задачу; при ошибке откладывает повтор с backoff."""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise PermanentError(f'Нет обработчика для {job.kind}')
+        func(**job.payload)
+    except Exception as error:
+        job.attempts += 1
+        job.error = traceback.format_exc()
+        permanent = isinstance(error, PermanentError)
+        if permanent or job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=2 ** job.attempts
+            )
+        job.locked_by, job.locked_at = '', None
+        job.save(update_fields=[
+            'attempts', 'error', 'status', 'run_after',
+            'locked_by', 'locked_at',
+        ])
+        logger.warning('Job %s failed: %s', job, error)
+        return False
+    job.delete()
+    return True
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipes import similarity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MinHash signatures and LSH buckets for similar recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=20000,
+            help='Number of recipes hashed per batch.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(total):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{total} recipes, {total / elapsed:.0f}/s')
+
+        total = similarity.build(options['batch_size'], progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {total} recipes in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from recipes import shopping_list
+from recipes.models import ShoppingCart, ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Compare stored shopping lists with carts and optionally rebuild.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Rebuild shopping lists that differ from carts.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of users checked per batch.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = sorted(
+            set(ShoppingCart.objects.values_list('user_id', flat=True))
+            | set(ShoppingListItem.objects.values_list('user_id', flat=True))
+        )
+        batch_size = options['batch_size']
+        broken = []
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            expected = shopping_list.expected_items(batch)
+            stored = shopping_list.stored_items(batch)
+            broken.extend(sorted({
+                user_id for user_id, ingredient_id
+                in expected.keys() | stored.keys()
+                if expected.get((user_id, ingredient_id))
+                != stored.get((user_id, ingredient_id))
+            }))
+        self.stdout.write(
+            f'Checked {len(user_ids)} users, {len(broken)} inconsistent.'
+        )
+        if broken and options['fix']:
+            for start in range(0, len(broken), batch_size):
+                shopping_list.rebuild(broken[start:start + batch_size])
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {len(broken)} shopping lists.'
+            ))
@@ -0,0 +1,53 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipes import renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe image files that no recipe references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Keep unreferenced files modified more recently than this.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report files that would be deleted.'
+        )
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        referenced = set()
+        for image, image_renditions in Recipe.objects.values_list(
+            'image', 'image_renditions'
+        ).iterator():
+            referenced.add(image)
+            referenced |= renditions.paths(image_renditions)
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        directory = field.upload_to
+        if not storage.exists(directory):
+            self.stdout.write('Nothing to collect.')
+            return
+        deleted = freed = kept = 0
+        for filename in storage.listdir(directory)[1]:
+            name = os.path.join(directory, filename)
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) > cutoff:
+                kept += 1
+                continue
+            deleted += 1
+            freed += storage.size(name)
+            if not options['dry_run']:
+                storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would delete" if options["dry_run"] else "Deleted"} '
+            f'{deleted} files ({freed / 2 ** 20:.1f} MiB), kept {kept} '
+            f'recent unreferenced files.'
+        ))
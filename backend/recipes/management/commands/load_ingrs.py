@@ -1,23 +1,112 @@
 import csv
+import json
 import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from foodgram.settings import BASE_DIR
-from recipes.models import Ingredient
+from recipes import versions
+from recipes.models import Ingredient, IngredientAmount
+
+DATA_DIR = os.path.join(BASE_DIR, 'recipes', 'data')
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as csv_file:
+        for row in csv.reader(csv_file):
+            name, measurement_unit = row
+            yield name, measurement_unit
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as json_file:
+        for item in json.load(json_file):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
 
 
 class Command(BaseCommand):
-    help = 'Load data from ingredients.csv to DB.'
+    help = 'Load ingredients from ingredients.csv or ingredients.json to DB.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(DATA_DIR, 'ingredients.csv'),
+            help='CSV (name,measurement_unit) or JSON file.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete ingredients missing from the file '
+                 'unless they are used in recipes.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report changes and roll them back.'
+        )
 
     def handle(self, *args, **options):
-        data_dir = os.path.join(BASE_DIR, 'recipes', 'data')
-        with open(
-                os.path.join(data_dir, 'ingredients.csv'),
-                encoding='utf-8'
-        ) as csv_file:
-            for row in csv.reader(csv_file):
-                name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+        started = time.perf_counter()
+        with transaction.atomic():
+            existing = {
+                (name, measurement_unit): pk
+                for pk, name, measurement_unit
+                in Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
                 )
+            }
+            seen = set()
+            read = created = 0
+            for batch in batched(reader(path), options['batch_size']):
+                read += len(batch)
+                new = []
+                for key in batch:
+                    if key not in existing and key not in seen:
+                        new.append(Ingredient(
+                            name=key[0], measurement_unit=key[1]
+                        ))
+                    seen.add(key)
+                Ingredient.objects.bulk_create(new, ignore_conflicts=True)
+                created += len(new)
+            pruned = kept = 0
+            if options['prune']:
+                stale = [pk for key, pk in existing.items() if key not in seen]
+                used = set(IngredientAmount.objects.filter(
+                    ingredient_id__in=stale
+                ).values_list('ingredient_id', flat=True).distinct())
+                kept = len(used)
+                for batch in batched(
+                    (pk for pk in stale if pk not in used),
+                    options['batch_size']
+                ):
+                    pruned += Ingredient.objects.filter(
+                        pk__in=batch
+                    ).delete()[1].get(Ingredient._meta.label, 0)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+            elif created or pruned:
+                versions.bump(versions.INGREDIENTS)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Dry run: " if options["dry_run"] else ""}'
+            f'read {read} rows, created {created}, pruned {pruned}, '
+            f'kept {kept} used in recipes; '
+            f'{elapsed:.2f}s, {read / elapsed if elapsed else 0:.0f} rows/s'
+        ))
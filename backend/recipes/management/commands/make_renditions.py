@@ -0,0 +1,57 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from recipes import renditions
+from recipes.models import Recipe
+
+
+def render(item):
+    pk, name = item
+    try:
+        return pk, renditions.render(name), None
+    except Exception as error:
+        return pk, None, f'{type(error).__name__}: {error}'
+
+
+class Command(BaseCommand):
+    help = 'Generate card, detail and retina renditions for recipe images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate renditions that already exist.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.filter(image_renditions={})
+        items = list(recipes.values_list('pk', 'image'))
+        connections.close_all()
+        started = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            for pk, result, error in executor.map(
+                render, items, chunksize=16
+            ):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Recipe {pk}: {error}')
+                    continue
+                Recipe.objects.filter(pk=pk).update(image_renditions=result)
+                done += 1
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done} images, {failed} failed; {elapsed:.2f}s, '
+            f'{done / elapsed if elapsed else 0:.1f} images/s'
+        ))
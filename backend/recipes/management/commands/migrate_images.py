@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from recipes import renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Rename existing recipe images and renditions to '
+            'content-addressed names. Old files are removed by gc_images.')
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        migrated = missing = 0
+        blobs = set()
+
+        def move(name):
+            if storage.is_content_name(name):
+                return name
+            with storage.open(name) as content:
+                return storage.save(name, content)
+
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_renditions'
+        )
+        for recipe in recipes.iterator():
+            old = recipe.image.name
+            try:
+                image = move(old)
+                image_renditions = {
+                    size: {
+                        key: move(value) if key in renditions.FORMATS
+                        else value
+                        for key, value in entry.items()
+                    }
+                    for size, entry in (recipe.image_renditions or {}).items()
+                }
+            except FileNotFoundError as error:
+                missing += 1
+                self.stderr.write(f'Recipe {recipe.pk}: {error}')
+                continue
+            blobs.add(image)
+            if image == old:
+                continue
+            migrated += Recipe.objects.filter(pk=recipe.pk, image=old).update(
+                image=image, image_renditions=image_renditions
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Migrated {migrated} recipes to {len(blobs)} unique images, '
+            f'{missing} missing files. Run gc_images to remove old files.'
+        ))
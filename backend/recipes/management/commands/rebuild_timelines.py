@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes import timeline
+from recipes.models import TimelineEntry
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = ('Recompute fan-out flags of subscriptions and backfill '
+            'followers\' timelines.')
+
+    def handle(self, *args, **options):
+        author_ids = Follow.objects.order_by('author_id').values_list(
+            'author_id', flat=True
+        ).distinct()
+        limit = settings.FEED_FANOUT_LIMIT
+        backfilled = read_on_demand = 0
+        for author_id in author_ids.iterator():
+            follows = list(Follow.objects.filter(
+                author_id=author_id
+            ).order_by('id').values_list('id', 'user_id'))
+            fan_out, direct = follows[:limit], follows[limit:]
+            with transaction.atomic():
+                Follow.objects.filter(
+                    pk__in=[pk for pk, _ in fan_out]
+                ).update(fan_out=True)
+                Follow.objects.filter(
+                    pk__in=[pk for pk, _ in direct]
+                ).update(fan_out=False)
+                TimelineEntry.objects.filter(
+                    author_id=author_id,
+                    user_id__in=[user_id for _, user_id in direct]
+                ).delete()
+                for _, user_id in fan_out:
+                    timeline.backfill(user_id, author_id)
+            backfilled += len(fan_out)
+            read_on_demand += len(direct)
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {backfilled} subscriptions, '
+            f'{read_on_demand} read on demand.'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = ('Recalculate denormalized favorite, cart, recipe and follower '
+            'counters.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report counters that differ, do not fix them.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            report = counters.reconcile(fix=not options['check'])
+        verb = 'differ' if options['check'] else 'fixed'
+        for label, stale in report.items():
+            self.stdout.write(f'{label}: {stale} {verb}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Total {sum(report.values())} {verb}.'
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from recipes import jobs
+
+
+class Command(BaseCommand):
+    help = ('Process background jobs. Several workers may run '
+            'concurrently.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once the queue is empty.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Seconds to wait when the queue is empty.'
+        )
+        parser.add_argument(
+            '--kind', action='append', dest='kinds',
+            help='Only process jobs of this kind (repeatable).'
+        )
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        done = failed = 0
+        self.stdout.write(f'Worker {worker} started.')
+        try:
+            while True:
+                close_old_connections()
+                job = jobs.claim(worker, options['kinds'])
+                if job is None:
+                    if options['burst']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                if jobs.run(job):
+                    done += 1
+                else:
+                    failed += 1
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Worker {worker}: {done} done, {failed} failed.'
+        ))
@@ -0,0 +1,265 @@
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes import counters, shopping_list, versions
+from recipes.db import copy_rows
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Follow, User
+
+SEED_PASSWORD = 'seed-password'
+# Даты отсчитываются от UNTIL, а не от текущего времени, чтобы запуски
+# с одинаковым --seed давали одинаковые данные.
+UNTIL = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PERIOD = timedelta(days=365)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ZipfSampler:
+    """
+    Выбор из population с вероятностью 1 / rank ** exponent. Ранги
+    перемешаны, чтобы популярность не совпадала с порядком id.
+    """
+    def __init__(self, rng, population, exponent):
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = list(accumulate(
+            rank ** -exponent for rank in range(1, len(self.population) + 1)
+        ))
+
+    def choices(self, count):
+        return self.rng.choices(
+            self.population, cum_weights=self.cum_weights, k=count
+        )
+
+    def distinct(self, count, exclude=None, rounds=5):
+        """
+        До count разных значений. При сильном перекосе распределения
+        может вернуть меньше.
+        """
+        picked = set()
+        for _ in range(rounds):
+            picked.update(self.choices(count - len(picked)))
+            picked.discard(exclude)
+            if len(picked) >= count:
+                break
+        return sorted(picked)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic users, recipes, ingredient amounts, tags, '
+        'follows, favorites and carts; COPY on PostgreSQL, bulk_create '
+        'elsewhere.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Average follows per user.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Average favorites per user.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=3,
+            help='Average shopping cart recipes per user.'
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Exponent of author, recipe and ingredient popularity.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                'Справочник ингредиентов пуст, сначала выполните load_ingrs'
+            )
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно не меньше 2 пользователей и 1 рецепта')
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.exponent = options['zipf']
+        started = time.perf_counter()
+        self.total = 0
+        user_ids = self.create_users()
+        authors = ZipfSampler(self.rng, user_ids, self.exponent)
+        recipe_ids = self.create_recipes(authors)
+        self.create_amounts(recipe_ids, ingredient_ids)
+        self.create_tags(recipe_ids)
+        self.create_follows(user_ids, authors)
+        recipes = ZipfSampler(self.rng, recipe_ids, self.exponent)
+        self.create_links(Favorite, user_ids, recipes, options['favorites'])
+        self.create_links(ShoppingCart, user_ids, recipes, options['carts'])
+        derived = time.perf_counter()
+        self.rebuild_derived(user_ids[0])
+        self.stdout.write(
+            f'Counters and shopping lists: '
+            f'{time.perf_counter() - derived:.1f}s'
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {self.total} rows in {elapsed:.1f}s, '
+            f'{self.total / elapsed:.0f} rows/s. '
+            f'Password of seeded users: {SEED_PASSWORD}. '
+            f'Run rebuild_timelines, build_similarity and update_trending '
+            f'to fill the feed, similar recipes and trending.'
+        ))
+
+    def step(self, label, func, *args):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = func(*args)
+        elapsed = time.perf_counter() - started
+        self.total += rows
+        self.stdout.write(
+            f'{label}: {rows} rows, {elapsed:.1f}s, '
+            f'{rows / elapsed if elapsed else 0:.0f} rows/s'
+        )
+
+    def write(self, model, fields, rows):
+        written = 0
+        for batch in batched(rows, self.options['batch_size']):
+            copy_rows(model, fields, batch)
+            written += len(batch)
+        return written
+
+    def new_ids(self, model, last_id):
+        return list(model.objects.filter(
+            pk__gt=last_id
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def last_id(self, model):
+        return model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+
+    def random_date(self, since=UNTIL - PERIOD):
+        return since + (UNTIL - since) * self.rng.random()
+
+    def create_users(self):
+        last_id = self.last_id(User)
+        password = make_password(SEED_PASSWORD)
+        prefix = f'seed{self.options["seed"]}-{last_id}-'
+        self.step('User', self.write, User, (
+            'password', 'is_superuser', 'username', 'email', 'first_name',
+            'last_name', 'is_active', 'is_staff', 'is_admin',
+            'recipes_count', 'followers_count',
+        ), (
+            (password, False, f'{prefix}{i}', f'{prefix}{i}@example.com',
+             'Имя', 'Фамилия', True, False, False, 0, 0)
+            for i in range(self.options['users'])
+        ))
+        return self.new_ids(User, last_id)
+
+    def create_recipes(self, authors):
+        last_id = self.last_id(Recipe)
+
+        def rows():
+            for i in range(self.options['recipes']):
+                pub_date = self.random_date()
+                yield (
+                    authors.choices(1)[0], f'Рецепт {last_id + i + 1}',
+                    'recipes/images/seed.jpg', 'Описание рецепта',
+                    self.rng.randint(5, 180), pub_date, pub_date,
+                    0, 0, Recipe.IMAGE_READY, {}, 0.0,
+                )
+        self.step('Recipe', self.write, Recipe, (
+            'author_id', 'name', 'image', 'text', 'cooking_time',
+            'pub_date', 'updated_at', 'favorites_count', 'carts_count',
+            'image_status', 'image_renditions', 'trending_score',
+        ), rows())
+        self.pub_dates = dict(Recipe.objects.filter(
+            pk__gt=last_id
+        ).order_by('pk').values_list('pk', 'pub_date'))
+        return list(self.pub_dates)
+
+    def create_amounts(self, recipe_ids, ingredient_ids):
+        ingredients = ZipfSampler(self.rng, ingredient_ids, self.exponent)
+        self.step('IngredientAmount', self.write, IngredientAmount, (
+            'recipe_id', 'ingredient_id', 'amount',
+        ), (
+            (recipe_id, ingredient_id, self.rng.randint(1, 1000))
+            for recipe_id in recipe_ids
+            for ingredient_id in ingredients.distinct(
+                min(self.rng.randint(3, 12), len(ingredient_ids))
+            )
+        ))
+
+    def create_tags(self, recipe_ids):
+        tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+        if not tag_ids:
+            return
+        self.step('Recipe tags', self.write, Recipe.tags.through, (
+            'recipe_id', 'tag_id',
+        ), (
+            (recipe_id, tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in sorted(self.rng.sample(
+                tag_ids, self.rng.randint(1, min(3, len(tag_ids)))
+            ))
+        ))
+
+    def per_user(self, average):
+        return self.rng.randint(0, 2 * average)
+
+    def create_follows(self, user_ids, authors):
+        followers = Counter()
+
+        def rows():
+            for user_id in user_ids:
+                for author_id in authors.distinct(
+                    min(self.per_user(self.options['follows']),
+                        len(user_ids) - 1),
+                    exclude=user_id
+                ):
+                    followers[author_id] += 1
+                    yield (user_id, author_id, followers[author_id]
+                           <= settings.FEED_FANOUT_LIMIT)
+        self.step('Follow', self.write, Follow, (
+            'user_id', 'author_id', 'fan_out',
+        ), rows())
+
+    def create_links(self, model, user_ids, recipes, average):
+        self.step(model.__name__, self.write, model, (
+            'user_id', 'recipe_id', 'created',
+        ), (
+            (user_id, recipe_id, self.random_date(self.pub_dates[recipe_id]))
+            for user_id in user_ids
+            for recipe_id in recipes.distinct(min(
+                self.per_user(average), len(recipes.population)
+            ))
+        ))
+
+    def rebuild_derived(self, first_user_id):
+        counters.reconcile()
+        cart_users = ShoppingCart.objects.filter(
+            user_id__gte=first_user_id
+        ).order_by('user_id').values_list('user_id', flat=True).distinct()
+        for batch in batched(cart_users, 500):
+            shopping_list.rebuild(batch)
+        versions.bump(versions.RECIPE_INGREDIENTS)
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipes import trending
+
+
+class Command(BaseCommand):
+    help = ('Add favorite and cart events since the last run to trending '
+            'scores.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Reset scores and recompute them from all events.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        events, recipes = trending.update(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {events} events for {recipes} recipes in '
+            f'{time.perf_counter() - started:.2f}s.'
+        ))
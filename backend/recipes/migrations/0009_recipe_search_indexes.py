@@ -0,0 +1,50 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEXES = (
+    (
+        'recipe_search_vector_idx',
+        "CREATE INDEX IF NOT EXISTS recipe_search_vector_idx "
+        "ON recipes_recipe USING gin (("
+        "setweight(to_tsvector('russian'::regconfig, "
+        "COALESCE(name, '')), 'A') || "
+        "setweight(to_tsvector('russian'::regconfig, "
+        "COALESCE(text, '')), 'B')))",
+    ),
+    (
+        'recipe_name_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS recipe_name_trgm_idx '
+        'ON recipes_recipe USING gin (UPPER(name) gin_trgm_ops)',
+    ),
+    (
+        'ingredient_name_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+        'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)',
+    ),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, sql in INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_shoppinglistitem'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
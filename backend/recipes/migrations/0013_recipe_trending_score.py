@@ -0,0 +1,64 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_created(apps, schema_editor):
+    """
+    Существующим записям избранного и корзины проставляется дата
+    публикации рецепта, а не время миграции: иначе первый
+    update_trending --full посчитал бы все прошлые события свежими.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    pub_date = models.Subquery(
+        Recipe.objects.filter(
+            pk=models.OuterRef('recipe_id')
+        ).values('pub_date')[:1]
+    )
+    for model_name in ('Favorite', 'ShoppingCart'):
+        apps.get_model('recipes', model_name).objects.update(
+            created=pub_date
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Точка отсчёта')),
+                ('last_run', models.DateTimeField(blank=True, null=True, verbose_name='Учтены события до')),
+            ],
+            options={
+                'verbose_name': 'Состояние популярности',
+                'verbose_name_plural': 'Состояние популярности',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, help_text='Сумма событий с затуханием, см. recipes.trending.', verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_score_idx'),
+        ),
+        migrations.RunPython(backfill_created, migrations.RunPython.noop),
+    ]
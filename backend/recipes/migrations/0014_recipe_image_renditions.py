@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='Заполняется автоматически, см. recipes.renditions.', verbose_name='Уменьшенные копии изображения'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:59
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='static/recipe/', verbose_name='Image'),
+        ),
+    ]
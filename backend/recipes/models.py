@@ -1,7 +1,10 @@
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
+from .storage import recipe_image_storage
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -63,6 +66,7 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Image',
         upload_to='static/recipe/',
+        storage=recipe_image_storage,
     )
     text = models.TextField(
         'Описание рецепта'
@@ -88,15 +92,66 @@ class Recipe(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now,
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Количество в избранных',
+        default=0,
+    )
+    carts_count = models.PositiveIntegerField(
+        'Количество в корзинах',
+        default=0,
+    )
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_PENDING, 'Обрабатывается'),
+        (IMAGE_READY, 'Готово'),
+        (IMAGE_FAILED, 'Ошибка'),
+    )
+    image_status = models.CharField(
+        'Обработка изображения',
+        max_length=16,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY,
+    )
+    image_renditions = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        help_text='Заполняется автоматически, см. recipes.renditions.',
+    )
+    trending_score = models.FloatField(
+        'Популярность',
+        default=0,
+        help_text='Сумма событий с затуханием, см. recipes.trending.',
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=['-favorites_count', '-id'],
+                         name='recipe_favorites_count_idx'),
+            models.Index(fields=['-carts_count', '-id'],
+                         name='recipe_carts_count_idx'),
+            models.Index(fields=['-trending_score', '-id'],
+                         name='recipe_trending_score_idx'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        super().save(*args, **kwargs)
+
 
 class IngredientAmount(models.Model):
     recipe = models.ForeignKey(
@@ -129,6 +184,46 @@ class IngredientAmount(models.Model):
         )
 
 
+class RecipeSignature(models.Model):
+    """MinHash-сигнатура набора ингредиентов рецепта."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт',
+    )
+    signature = models.BinaryField('Сигнатура')
+
+    class Meta:
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+
+class RecipeBucket(models.Model):
+    """Корзина LSH: рецепты с совпадающей полосой сигнатуры."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+        verbose_name='Рецепт',
+    )
+    band = models.PositiveSmallIntegerField('Полоса')
+    bucket = models.BigIntegerField('Хэш полосы')
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'band'],
+                                    name='unique recipe band')
+        ]
+        indexes = [
+            models.Index(fields=['band', 'bucket'],
+                         name='recipe_bucket_band_idx'),
+        ]
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -142,6 +237,11 @@ class Favorite(models.Model):
         related_name='favorites',
         verbose_name='Рецепт',
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        default=timezone.now,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -165,6 +265,11 @@ class ShoppingCart(models.Model):
         related_name='carts',
         verbose_name='Рецепт',
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        default=timezone.now,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -175,6 +280,179 @@ class ShoppingCart(models.Model):
         ]
 
 
+class ShoppingListItem(models.Model):
+    """Сводное количество ингредиента в корзине пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        'Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Сводный список покупок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ingredient'],
+                                    name='unique shopping list item')
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Рецепт автора в ленте подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='unique timeline entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-recipe'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class TrendingState(models.Model):
+    """Состояние пересчёта trending_score (одна строка)."""
+    epoch = models.DateTimeField(
+        'Точка отсчёта',
+        default=timezone.now,
+    )
+    last_run = models.DateTimeField(
+        'Учтены события до',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Состояние популярности'
+        verbose_name_plural = 'Состояние популярности'
+
+    def __str__(self):
+        return f'{self.epoch:%Y-%m-%d %H:%M} / {self.last_run}'
+
+
+class Job(models.Model):
+    """Фоновая задача для команды run_jobs."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+    kind = models.CharField(
+        'Тип',
+        max_length=64,
+    )
+    payload = models.JSONField(
+        'Параметры',
+        default=dict,
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки',
+        default=0,
+    )
+    run_after = models.DateTimeField(
+        'Выполнить после',
+        default=timezone.now,
+    )
+    locked_by = models.CharField(
+        'Обработчик',
+        max_length=128,
+        blank=True,
+    )
+    locked_at = models.DateTimeField(
+        'Взята в работу',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        'Ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        'Дата создания',
+        default=timezone.now,
+    )
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+
+class TableVersion(models.Model):
+    """Счётчик изменений таблицы для ETag и Last-Modified."""
+    table = models.CharField(
+        'Таблица',
+        max_length=64,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(
+        'Версия',
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = 'Версия таблицы'
+        verbose_name_plural = 'Версии таблиц'
+
+    def __str__(self):
+        return f'{self.table}: {self.version}'
+
+
 class TagsRecipe(models.Model):
     """ Тег рецепта."""
     recipe = models.ForeignKey(
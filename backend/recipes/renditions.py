@@ -0,0 +1,73 @@
+"""
+Уменьшенные копии изображения рецепта в WebP и JPEG.
+
+Файлы лежат рядом с оригиналом в хранилище с именами по содержимому.
+Пути и фактические размеры хранятся в Recipe.image_renditions:
+{'card': {'width': 400, 'height': 300, 'webp': ..., 'jpeg': ...}, ...}.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .storage import recipe_image_storage
+
+RENDITIONS = {
+    'card': (400, 300),
+    'detail': (800, 600),
+    'retina': (1600, 1200),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True,
+                      'progressive': True}),
+}
+
+
+def flatten(image):
+    """RGB без прозрачности: JPEG её не поддерживает."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def resize(image, size):
+    """Обрезает до size; меньшие изображения не увеличивает."""
+    if image.width >= size[0] and image.height >= size[1]:
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    return resized
+
+
+def render(name, storage=recipe_image_storage):
+    """Создаёт файлы копий для изображения name и возвращает метаданные."""
+    with storage.open(name) as source:
+        image = flatten(ImageOps.exif_transpose(Image.open(source)))
+    directory = os.path.dirname(name)
+    renditions = {}
+    for size_name, size in RENDITIONS.items():
+        resized = resize(image, size)
+        entry = {'width': resized.width, 'height': resized.height}
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            entry[extension] = storage.save(
+                os.path.join(directory, f'{size_name}.{extension}'),
+                ContentFile(buffer.getvalue())
+            )
+        renditions[size_name] = entry
+    return renditions
+
+
+def paths(renditions):
+    return {
+        entry[extension]
+        for entry in (renditions or {}).values()
+        for extension in FORMATS
+        if entry.get(extension)
+    }
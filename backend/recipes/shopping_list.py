@@ -0,0 +1,129 @@
+"""
+Поддержка сводного списка покупок (ShoppingListItem).
+
+Таблица обновляется инкрементально при изменении корзины и состава
+рецептов, поэтому скачивание списка — одно чтение по индексу.
+Правки через админку в обход этих функций исправляет команда
+check_shopping_lists --fix.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import IngredientAmount, ShoppingCart, ShoppingListItem
+
+
+def recipe_amounts(recipe_ids):
+    """Суммарное количество каждого ингредиента в рецептах."""
+    return Counter(dict(
+        IngredientAmount.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list(
+            'ingredient_id'
+        ).annotate(
+            total=Sum('amount')
+        ).order_by()
+    ))
+
+
+def apply_delta(user_ids, delta):
+    """
+    Прибавляет delta {ingredient_id: amount} к спискам пользователей.
+    Недостающие позиции сначала вставляются с нулём через
+    ignore_conflicts, поэтому одновременное добавление первой единицы
+    ингредиента не падает на уникальном ограничении, а дальше все
+    строки меняются под select_for_update.
+    """
+    delta = {key: value for key, value in delta.items() if value}
+    user_ids = list(user_ids)
+    if not delta or not user_ids:
+        return
+    with transaction.atomic():
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids
+                for ingredient_id, amount in delta.items()
+                if amount > 0
+            ),
+            ignore_conflicts=True
+        )
+        to_update, to_delete = [], []
+        for item in ShoppingListItem.objects.select_for_update().filter(
+            user_id__in=user_ids, ingredient_id__in=delta
+        ):
+            item.amount += delta[item.ingredient_id]
+            if item.amount > 0:
+                to_update.append(item)
+            else:
+                to_delete.append(item.pk)
+        ShoppingListItem.objects.bulk_update(to_update, ['amount'])
+        ShoppingListItem.objects.filter(pk__in=to_delete).delete()
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_delta([user_id], recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_delta([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_ids).items()
+    })
+
+
+def change_recipe(recipe, delta):
+    """Применяет изменение состава рецепта ко всем корзинам с ним."""
+    apply_delta(
+        ShoppingCart.objects.filter(
+            recipe=recipe
+        ).values_list('user_id', flat=True),
+        delta
+    )
+
+
+def discard_recipe(recipe):
+    """Вычитает рецепт из всех списков; вызывать до удаления рецепта."""
+    change_recipe(recipe, {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts([recipe.pk]).items()
+    })
+
+
+def expected_items(user_ids):
+    """Списки покупок, посчитанные заново по корзинам."""
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in ShoppingCart.objects.filter(
+            user_id__in=user_ids,
+            recipe__amounts__isnull=False,
+        ).values_list(
+            'user_id', 'recipe__amounts__ingredient_id'
+        ).annotate(
+            total=Sum('recipe__amounts__amount')
+        ).order_by()
+    }
+
+
+def stored_items(user_ids):
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in ShoppingListItem.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'ingredient_id', 'amount')
+    }
+
+
+def rebuild(user_ids):
+    with transaction.atomic():
+        ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total
+            )
+            for (user_id, ingredient_id), total
+            in expected_items(user_ids).items()
+        )
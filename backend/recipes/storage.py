@@ -0,0 +1,55 @@
+"""
+Хранилище изображений рецептов с именами по содержимому.
+
+Файл сохраняется как <каталог>/<sha256>.<расширение>: одинаковые
+загрузки хранятся один раз, а URL не меняется, пока не изменится
+содержимое, поэтому nginx отдаёт такие файлы с вечным кэшем.
+Файлы общие для рецептов и не удаляются при замене изображения,
+неиспользуемые удаляет команда gc_images.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_NAME = re.compile(r'^[0-9a-f]{64}\.')
+EXTENSIONS = {'.jpeg': '.jpg'}
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        """Имя, под которым будет сохранено содержимое content."""
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        extension = EXTENSIONS.get(extension, extension)
+        return os.path.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Свежая дата изменения защищает файл от gc_images.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def is_content_name(name):
+        return bool(CONTENT_NAME.match(os.path.basename(name or '')))
+
+
+recipe_image_storage = ContentAddressedStorage()
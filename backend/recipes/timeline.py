@@ -0,0 +1,92 @@
+"""
+Лента рецептов от авторов, на которых подписан пользователь.
+
+Новый рецепт записывается в TimelineEntry первых FEED_FANOUT_LIMIT
+подписчиков автора (Follow.fan_out). Остальные подписчики популярных
+авторов читают их рецепты напрямую, поэтому стоимость публикации
+ограничена, а чтение ленты не соединяет Follow и Recipe целиком.
+"""
+from django.conf import settings
+from django.db.models import F
+from users.models import Follow
+
+from . import counters
+from .models import Recipe, TimelineEntry
+
+
+def fan_out_allowed(author_id):
+    """Есть ли у автора место для ещё одного подписчика с рассылкой."""
+    followers = Follow.objects.filter(
+        author_id=author_id, fan_out=True
+    ).values('id')[:settings.FEED_FANOUT_LIMIT]
+    return followers.count() < settings.FEED_FANOUT_LIMIT
+
+
+def follow(user_id, author_id):
+    """Создаёт подписку и заполняет ленту последними рецептами автора."""
+    subscription = Follow.objects.create(
+        user_id=user_id,
+        author_id=author_id,
+        fan_out=fan_out_allowed(author_id)
+    )
+    counters.followers([author_id], 1)
+    if subscription.fan_out:
+        backfill(user_id, author_id)
+    return subscription
+
+
+def unfollow(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    deleted, _ = Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    counters.followers([author_id], -deleted)
+    return deleted
+
+
+def backfill(user_id, author_id):
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, recipe_id=recipe_id,
+                          author_id=author_id, pub_date=pub_date)
+            for recipe_id, pub_date in recipes
+        ],
+        ignore_conflicts=True
+    )
+
+
+def fan_out(recipe):
+    """Записывает новый рецепт в ленты подписчиков с рассылкой."""
+    follower_ids = Follow.objects.filter(
+        author_id=recipe.author_id, fan_out=True
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, recipe_id=recipe.id,
+                          author_id=recipe.author_id,
+                          pub_date=recipe.pub_date)
+            for user_id in follower_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def feed_sources(user):
+    """
+    Наборы {recipe_id, pub_date} для слияния в ленту: записанная лента
+    и рецепты авторов, читаемые без рассылки.
+    """
+    return [
+        TimelineEntry.objects.filter(user=user).values(
+            'recipe_id', 'pub_date'
+        ),
+        Recipe.objects.filter(
+            author_id__in=Follow.objects.filter(
+                user=user, fan_out=False
+            ).values('author_id')
+        ).values('pub_date', recipe_id=F('id')),
+    ]
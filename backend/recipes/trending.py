@@ -0,0 +1,123 @@
+"""
+Популярность рецептов: trending_score = Σ w · 2^((t − epoch) / T½)
+по событиям избранного и корзины.
+
+Все оценки отнесены к общей точке отсчёта epoch, поэтому затухание
+не требует пересчёта: порядок тот же, что у Σ w · 2^((t − now) / T½).
+Команда update_trending добавляет только события после last_run.
+Когда множители становятся слишком большими, epoch переносится
+вперёд одним проходом по рецептам с ненулевой оценкой.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Favorite, Recipe, ShoppingCart, TrendingState
+
+WEIGHTS = {Favorite: 1.0, ShoppingCart: 2.0}
+REBASE_AFTER = 64
+SETTLE = timedelta(minutes=1)
+BATCH_SIZE = 500
+
+
+def half_life():
+    return timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+
+
+def weight(event_model, created, epoch):
+    return WEIGHTS[event_model] * 2 ** (
+        (created - epoch) / half_life()
+    )
+
+
+def collect(since, until, epoch):
+    """Вклад событий из (since, until] по рецептам и число событий."""
+    scores, total = Counter(), 0
+    for model in WEIGHTS:
+        events = model.objects.filter(created__lte=until)
+        if since is not None:
+            events = events.filter(created__gt=since)
+        for recipe_id, created in events.values_list(
+            'recipe_id', 'created'
+        ).iterator():
+            scores[recipe_id] += weight(model, created, epoch)
+            total += 1
+    return scores, total
+
+
+def add_scores(scores):
+    items = list(scores.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        Recipe.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            trending_score=F('trending_score') + Case(
+                *(When(pk=pk, then=Value(score)) for pk, score in batch),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        )
+
+
+def rebase(state, epoch):
+    factor = 2 ** (-((epoch - state.epoch) / half_life()))
+    Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') * factor
+    )
+    state.epoch = epoch
+
+
+def update(full=False):
+    """
+    Добавляет к оценкам события с прошлого запуска. События последней
+    минуты откладываются до следующего запуска, чтобы не потерять
+    ещё не зафиксированные транзакции.
+    """
+    until = timezone.now() - SETTLE
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(
+            pk=1, defaults={'epoch': until}
+        )
+        if full:
+            Recipe.objects.exclude(trending_score=0).update(trending_score=0)
+            state.epoch, state.last_run = until, None
+        elif until - state.epoch > half_life() * REBASE_AFTER:
+            rebase(state, until)
+        if state.last_run is not None and state.last_run >= until:
+            return 0, 0
+        scores, total = collect(state.last_run, until, state.epoch)
+        add_scores(scores)
+        state.last_run = until
+        state.save()
+    return total, len(scores)
+
+
+def discard(event):
+    """Вычитает вклад удаляемого события, если он уже учтён."""
+    state = TrendingState.objects.filter(pk=1).first()
+    if (state is None or state.last_run is None
+            or event.created > state.last_run):
+        return
+    Recipe.objects.filter(pk=event.recipe_id).update(
+        trending_score=Greatest(
+            F('trending_score') - weight(type(event), event.created,
+                                         state.epoch),
+            Value(0.0)
+        )
+    )
+
+
+def discard_many(event_model, events):
+    """Как discard, для пар (recipe_id, created) событий одной модели."""
+    state = TrendingState.objects.filter(pk=1).first()
+    if state is None or state.last_run is None:
+        return
+    scores = Counter()
+    for recipe_id, created in events:
+        if created <= state.last_run:
+            scores[recipe_id] -= weight(event_model, created, state.epoch)
+    add_scores(scores)
@@ -0,0 +1,52 @@
+"""
+Версии справочников и составов рецептов: номер увеличивается при каждом
+изменении таблицы, что позволяет отвечать 304 Not Modified и сверять
+индексы в памяти без чтения самих данных.
+Массовые операции в обход сигналов должны вызывать bump() сами,
+RECIPE_INGREDIENTS увеличивается явно при изменении состава рецепта.
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Ingredient, TableVersion, Tag
+
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+RECIPE_INGREDIENTS = 'recipe_ingredients'
+
+
+def bump(table):
+    now = timezone.now()
+    updated = TableVersion.objects.filter(table=table).update(
+        version=F('version') + 1, updated_at=now
+    )
+    if not updated:
+        TableVersion.objects.get_or_create(
+            table=table, defaults={'version': 1, 'updated_at': now}
+        )
+
+
+def get_versions(*tables):
+    """{таблица: (версия, дата изменения)} для запрошенных таблиц."""
+    versions = dict.fromkeys(tables, (0, None))
+    versions.update(
+        (table, (version, updated_at))
+        for table, version, updated_at in TableVersion.objects.filter(
+            table__in=tables
+        ).values_list('table', 'version', 'updated_at')
+    )
+    return versions
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags(**kwargs):
+    bump(TAGS)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients(**kwargs):
+    bump(INGREDIENTS)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from users.models import Follow, User
+from users.models import Follow, RevokedToken, User
 
 
 @admin.register(User)
@@ -7,6 +7,7 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'username', 'email', 'first_name', 'last_name')
     search_fields = ('username', 'email')
     list_filter = ('username', 'email')
+    readonly_fields = ('recipes_count', 'followers_count')
     empty_value_display = '-пусто-'
 
 
@@ -16,3 +17,11 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('user', 'author')
     list_filter = ('user', 'author')
     empty_value_display = '-пусто-'
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('id', 'jti', 'user', 'expires')
+    search_fields = ('jti',)
+    list_filter = ('expires',)
+    empty_value_display = '-пусто-'
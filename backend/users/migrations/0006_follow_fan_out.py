@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_sync_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='fan_out',
+            field=models.BooleanField(default=True, help_text='Новые рецепты автора записываются в ленту подписчика. Для подписчиков сверх FEED_FANOUT_LIMIT лента читает рецепты автора напрямую.', verbose_name='Рассылка в ленту'),
+        ),
+    ]
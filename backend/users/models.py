@@ -65,6 +65,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_admin = models.BooleanField(default=False)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+    )
 
     objects = UserManager()
 
@@ -100,6 +108,13 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор',
     )
+    fan_out = models.BooleanField(
+        'Рассылка в ленту',
+        default=True,
+        help_text='Новые рецепты автора записываются в ленту подписчика. '
+                  'Для подписчиков сверх FEED_FANOUT_LIMIT лента читает '
+                  'рецепты автора напрямую.',
+    )
 
     class Meta:
         verbose_name = 'Подписка'
@@ -110,3 +125,37 @@ class Follow(models.Model):
                 name='unique follow',
             )
         ]
+
+
+class SignedTokenUser(User):
+    """
+    Пользователь из подписанного токена. Поля, которых нет в токене,
+    загружаются одним запросом при первом обращении к любому из них.
+    """
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using, fields)
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField('Идентификатор токена', max_length=255,
+                           unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='revoked_tokens',
+        verbose_name='Пользователь',
+    )
+    expires = models.DateTimeField('Истекает', db_index=True)
+
+    class Meta:
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
@@ -1,8 +1,15 @@
 
+from django.conf import settings
 from djoser.serializers import UserCreateSerializer, UserSerializer
+from foodgram.middleware import TimedSerializerMixin
 from recipes.models import Recipe
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from . import tokens
 from .models import Follow, User
 
 
@@ -32,7 +39,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         return user
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(TimedSerializerMixin, UserSerializer):
     """Сериализатор для пользователя. """
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -44,40 +51,81 @@ class CustomUserSerializer(UserSerializer):
             'username',
             'first_name',
             'last_name',
-            'is_subscribed')
+            'is_subscribed',
+            'recipes_count',
+            'followers_count')
+        read_only_fields = ('recipes_count', 'followers_count')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return Follow.objects.filter(user=user, author=obj.id).exists()
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     """Сериализатор для краткого отображения сведений о рецепте"""
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+def get_recipes_limit(request):
+    """Число рецептов автора из ?recipes_limit= или по умолчанию."""
+    try:
+        return max(int(request.query_params['recipes_limit']), 0)
+    except (KeyError, ValueError):
+        return settings.DEFAULT_RECIPE_LIMIT
+
+
 class FollowSerializer(CustomUserSerializer):
-    """Сериализатор для вывода подписок пользователя"""
+    """
+    Сериализатор для вывода подписок пользователя.
+    FollowListView заранее подставляет latest_recipes,
+    иначе рецепты читаются отдельным запросом.
+    """
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = User
         fields = ('email', 'id', 'username', 'first_name', 'last_name',
-                  'is_subscribed', 'recipes', 'recipes_count')
-
-    @staticmethod
-    def get_recipes_count(obj):
-        return obj.recipes.count()
+                  'is_subscribed', 'recipes', 'recipes_count',
+                  'followers_count')
+        read_only_fields = ('recipes_count', 'followers_count')
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes = obj.recipes.all()
-        recipes_limit = request.query_params.get('recipes_limit')
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        if hasattr(obj, 'latest_recipes'):
+            recipes = obj.latest_recipes
+        else:
+            request = self.context.get('request')
+            recipes = obj.recipes.all()[:get_recipes_limit(request)]
         return ShortRecipeSerializer(recipes, many=True).data
+
+
+class SignedTokenSerializer(serializers.Serializer):
+    """Ответ на вход при SIGNED_TOKEN_AUTH: пара подписанных токенов."""
+    def to_representation(self, instance):
+        return tokens.issue(instance.user)
+
+
+class SignedTokenRefreshSerializer(serializers.Serializer):
+    """
+    Обмен refresh-токена на новую пару. Флаги берутся из БД, старый
+    refresh-токен отзывается, поэтому повторно его не использовать.
+    """
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            refresh = RefreshToken(attrs['refresh'])
+        except TokenError:
+            raise AuthenticationFailed('Недействительный токен')
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if user is None or not tokens.revocations.revoke(refresh):
+            raise AuthenticationFailed('Недействительный токен')
+        return tokens.issue(user)
@@ -0,0 +1,99 @@
+"""
+Подписанные токены доступа (SIGNED_TOKEN_AUTH).
+
+В токене лежат id пользователя и флаги, нужные представлениям, поэтому
+аутентификация запроса обходится без обращения к БД. Отозванные токены
+хранятся в RevokedToken; список в памяти процесса перечитывается раз
+в TOKEN_REVOCATION_SYNC секунд, а отзыв в этом процессе виден сразу.
+"""
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RevokedToken, SignedTokenUser
+
+CLAIMS = ('is_staff', 'is_superuser')
+
+
+def issue(user):
+    """Пара токенов в формате ответа djoser на вход."""
+    refresh = RefreshToken.for_user(user)
+    for claim in CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return {'auth_token': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+def get_user(token):
+    """Пользователь из утверждений токена без запроса к БД."""
+    values = {
+        'id': token[api_settings.USER_ID_CLAIM],
+        'is_active': True,
+        **{claim: token.get(claim, False) for claim in CLAIMS},
+    }
+    names = [
+        field.attname for field in SignedTokenUser._meta.concrete_fields
+        if field.attname in values
+    ]
+    return SignedTokenUser.from_db(
+        DEFAULT_DB_ALIAS, names, [values[name] for name in names]
+    )
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = frozenset()
+        self._synced_at = None
+
+    def sync(self):
+        self._revoked = frozenset(RevokedToken.objects.filter(
+            expires__gt=timezone.now()
+        ).values_list('jti', flat=True))
+        self._synced_at = time.monotonic()
+
+    def get_revoked(self):
+        if (
+            self._synced_at is None
+            or time.monotonic() - self._synced_at
+            > settings.TOKEN_REVOCATION_SYNC
+        ):
+            with self._lock:
+                if (
+                    self._synced_at is None
+                    or time.monotonic() - self._synced_at
+                    > settings.TOKEN_REVOCATION_SYNC
+                ):
+                    self.sync()
+        return self._revoked
+
+    def __contains__(self, jti):
+        return jti in self.get_revoked()
+
+    def revoke(self, token):
+        """
+        Отзывает токен до истечения его срока. Возвращает False, если
+        токен уже был отозван.
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        expires = datetime.fromtimestamp(token['exp'], tz=timezone.utc)
+        RevokedToken.objects.filter(expires__lte=timezone.now()).delete()
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    user_id=token[api_settings.USER_ID_CLAIM],
+                    expires=expires,
+                )
+        except IntegrityError:
+            return False
+        self._revoked = self._revoked | {jti}
+        return True
+
+
+revocations = RevocationList()
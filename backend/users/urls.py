@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import CustomUserViewSet, FollowListView, FollowViewSet
+from .views import (CustomUserViewSet, FollowListView, FollowViewSet,
+                    LogoutView, SignedTokenRefreshView)
 
 router = DefaultRouter()
 router.register('users', CustomUserViewSet, basename='users')
@@ -17,7 +19,15 @@ urlpatterns = [
         FollowViewSet.as_view(),
         name='subscribe'
     ),
+    path('auth/token/logout/', LogoutView.as_view(), name='logout'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.SIGNED_TOKEN_AUTH:
+    urlpatterns.insert(0, path(
+        'auth/token/refresh/',
+        SignedTokenRefreshView.as_view(),
+        name='token-refresh'
+    ))
@@ -1,14 +1,54 @@
-from api.pagination import CustomPagination
-from djoser.views import UserViewSet
+from collections import defaultdict
+
+from api.pagination import CursorAwarePagination, CustomPagination
+from django.db import transaction
+from django.db.models import BooleanField, Exists, F, OuterRef, Value, Window
+from django.db.models.functions import RowNumber
+from djoser.views import TokenDestroyView, UserViewSet
+from recipes import timeline
+from recipes.models import Recipe
 from rest_framework import status
 from rest_framework.generics import ListAPIView, get_object_or_404
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
 
+from . import tokens
+from .authentication import SignedTokenAuthentication
 from .models import Follow, User
-from .serializers import CustomUserSerializer, FollowSerializer
+from .serializers import (CustomUserSerializer, FollowSerializer,
+                          SignedTokenRefreshSerializer, get_recipes_limit)
+
+
+def latest_recipes_by_author(author_ids, limit):
+    """
+    Последние limit рецептов каждого автора одним запросом
+    с ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY pub_date DESC).
+    """
+    ranked = Recipe.objects.filter(
+        author_id__in=author_ids
+    ).annotate(
+        recipe_rank=Window(
+            RowNumber(),
+            partition_by=F('author_id'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        )
+    ).order_by().values(
+        'id', 'author_id', 'name', 'image', 'cooking_time', 'recipe_rank'
+    )
+    sql, params = ranked.query.sql_with_params()
+    recipes = defaultdict(list)
+    for recipe in Recipe.objects.raw(
+        f'SELECT * FROM ({sql}) ranked WHERE recipe_rank <= %s '
+        f'ORDER BY author_id, recipe_rank',
+        (*params, limit)
+    ):
+        recipes[recipe.author_id].append(recipe)
+    return recipes
 
 
 class CustomUserViewSet(UserViewSet):
@@ -17,6 +57,17 @@ class CustomUserViewSet(UserViewSet):
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            )
+        )
+
 
 class FollowViewSet(APIView):
     """APIView для добавления и удаления подписки на автора"""
@@ -40,10 +91,9 @@ class FollowViewSet(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         author = get_object_or_404(User, id=user_id)
-        Follow.objects.create(
-            user=request.user,
-            author_id=user_id
-        )
+        with transaction.atomic():
+            timeline.follow(request.user.id, author.id)
+        author.refresh_from_db(fields=['followers_count'])
         return Response(
             self.serializer_class(author, context={'request': request}).data,
             status=status.HTTP_201_CREATED
@@ -52,12 +102,9 @@ class FollowViewSet(APIView):
     def delete(self, request, *args, **kwargs):
         user_id = self.kwargs.get('user_id')
         get_object_or_404(User, id=user_id)
-        subscription = Follow.objects.filter(
-            user=request.user,
-            author_id=user_id
-        )
-        if subscription:
-            subscription.delete()
+        with transaction.atomic():
+            deleted = timeline.unfollow(request.user.id, user_id)
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             {'error': 'Вы не подписаны на пользователя'},
@@ -69,7 +116,56 @@ class FollowListView(ListAPIView):
     """APIView для просмотра подписок."""
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPagination
+    pagination_class = CursorAwarePagination
+    cursor_ordering = ('-id',)
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
+        return User.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).order_by(*self.cursor_ordering)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        limit = get_recipes_limit(self.request)
+        recipes = latest_recipes_by_author(
+            [author.pk for author in page], limit
+        ) if page and limit else {}
+        for author in page or ():
+            author.latest_recipes = recipes.get(author.pk, [])
+        return page
+
+
+class SignedTokenRefreshView(APIView):
+    """Новая пара подписанных токенов по refresh-токену."""
+    authentication_classes = ()
+    permission_classes = [AllowAny]
+
+    def get_authenticate_header(self, request):
+        return SignedTokenAuthentication().authenticate_header(request)
+
+    def post(self, request):
+        serializer = SignedTokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data)
+
+
+class LogoutView(TokenDestroyView):
+    """
+    Выход djoser; подписанный токен запроса и переданный refresh-токен
+    отзываются.
+    """
+    def post(self, request):
+        if isinstance(request.auth, Token):
+            tokens.revocations.revoke(request.auth)
+        refresh = None
+        if request.data.get('refresh'):
+            try:
+                refresh = RefreshToken(request.data['refresh'])
+            except TokenError:
+                pass
+        if refresh is not None and (
+                refresh[api_settings.USER_ID_CLAIM] == request.user.pk):
+            tokens.revocations.revoke(refresh)
+        return super().post(request)